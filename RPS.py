@@ -1,27 +1,82 @@
+import io
 import os
+import sys
+import re
+import json
+import uuid
+import hashlib
+import importlib.util
+import tracemalloc
+import signal
 import discord
 import asyncio
-import random
+import aiohttp
 import logging
-import requests
-from discord import app_commands, Member, ui
-from discord import Message
-from discord.ext import commands
+from collections import deque
+from discord import app_commands, ui
+from discord.ext import commands, tasks
 from keep_alive import keep_alive
 from dotenv import load_dotenv
-from typing import cast, Optional
-from datetime import datetime
+from typing import Optional
+from datetime import datetime, timedelta
+from match_store import create_store
+from matchmaking import MatchmakingPool, DEFAULT_RATING, update_ratings
+from bracket import Bracket
+from user_cache import UserCache, UserInfo
+from outbound import OutboundQueue, PROMPT, SCOREBOARD, INFO
+from game import resolve_round, match_winner, match_outcome, scoreboard, parse_moves
+from guild_config import ConfigStore, GuildConfig
+from log_setup import setup_logging, match_id_var, ROUND_LOGGER
 
 load_dotenv()
-logging.basicConfig(level=logging.INFO)
+round_log = logging.getLogger(ROUND_LOGGER)
 
 TOKEN = os.getenv("DISCORD_TOKEN")
 if not TOKEN:
     raise RuntimeError("DISCORD_TOKEN env var not set")
 
-active_matches = {}  # Format: {channel_id: {"interaction": interaction_obj, "players": [id1, id2], "cancelled": False}}
-
-keep_alive()
+# Sharding: SHARD_COUNT=auto lets discord.py pick the shard count, a number fixes it.
+# SHARD_IDS (e.g. "0,1") runs only those shards so several processes can split them.
+SHARD_COUNT = os.getenv("SHARD_COUNT", "")
+SHARD_IDS = [int(s) for s in os.getenv("SHARD_IDS", "").split(",") if s.strip()] or None
+if SHARD_IDS and not SHARD_COUNT.isdigit():
+    raise RuntimeError("SHARD_IDS requires a numeric SHARD_COUNT")
+
+# Slash command sync: only when the command tree changed since the last sync recorded in this file.
+# DEV_GUILD_ID syncs to that one guild instead, which Discord applies instantly (for testing).
+COMMAND_HASH_FILE = os.getenv("COMMAND_HASH_FILE", ".command_tree.json")
+DEV_GUILD_ID = os.getenv("DEV_GUILD_ID")
+FORCE_SYNC = os.getenv("FORCE_SYNC") == "1"
+
+# INTERACTIONS_MODE=http takes interactions from Discord's HTTP webhook instead of the gateway
+# (see http_interactions.py); DISCORD_PUBLIC_KEY is the application's key for checking requests.
+INTERACTIONS_MODE = os.getenv("INTERACTIONS_MODE", "gateway")
+DISCORD_PUBLIC_KEY = os.getenv("DISCORD_PUBLIC_KEY")
+PORT = int(os.getenv("PORT", "8080"))
+if INTERACTIONS_MODE == "http" and not DISCORD_PUBLIC_KEY:
+    raise RuntimeError("INTERACTIONS_MODE=http requires DISCORD_PUBLIC_KEY")
+if INTERACTIONS_MODE == "http" and SHARD_COUNT:
+    raise RuntimeError("Shards are gateway connections; scale INTERACTIONS_MODE=http with replicas instead")
+
+# Match records and the player index; shared between processes when MATCH_STORE_URL is redis://
+store = create_store(os.getenv("MATCH_STORE_URL"))
+
+active_matches = {}  # Format: {match_id: {"interaction": interaction_obj, "players": [id1, id2], "channel_id": id, ...}} (matches run by this process)
+waiting_matches = []  # Matches queued until their players are free, oldest first
+players_freed = asyncio.Condition()  # Notified whenever a match ends and releases its players
+matchmaking_pools = {}  # Format: {(channel_id, wins): MatchmakingPool} players waiting in /rps_queue
+running_brackets = {}  # Format: {bracket_id: asyncio.Task} brackets driven by this process
+spectator_feeds = {}  # Format: {channel_id: {"guild_id": id, "watchers": {user_id}, "lines": deque, "message": msg, ...}} (/rps_watch)
+scoreboard_webhooks = {}  # Format: {channel_id: discord.Webhook, or None if the bot can't have one there}
+webhook_lock = asyncio.Lock()  # So two matches in one channel don't both create a webhook
+outbound = OutboundQueue()  # Match traffic to Discord, prompts first and informational DMs last
+user_cache = UserCache()  # Player names/avatars seen in interactions, for rendering without fetch_user
+last_snapshot: Optional[tracemalloc.Snapshot] = None  # Previous /rps_memory snapshot, for growth diffs
+trace_stop: Optional[asyncio.TimerHandle] = None  # Ends allocation tracing TRACE_LIMIT after /rps_memory started it
+shutting_down = False  # Set once a shutdown signal arrives; no new commands or matches after that
+shutdown_task: Optional[asyncio.Task] = None
+process_id = uuid.uuid4().hex  # Owner name for the leases this process takes in the store
+held_leases = set()  # Lease names this process holds and renews: "match:<id>" and "bracket:<id>"
 
 # Intents
 intents = discord.Intents.default()
@@ -29,9 +84,29 @@ intents.message_content = True
 intents.dm_messages = True
 intents.reactions = True
 
+class RPSTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # Turn commands away while draining for a shutdown
+        if shutting_down:
+            await interaction.response.send_message(
+                "🔧 The bot is restarting, please try again in a minute.", ephemeral=True
+            )
+            return False
+        return True
+
 # Initialize bot
-bot = commands.Bot(command_prefix="!", intents=intents)
+if SHARD_COUNT:
+    bot = commands.AutoShardedBot(
+        command_prefix="!",
+        intents=intents,
+        tree_cls=RPSTree,
+        shard_count=int(SHARD_COUNT) if SHARD_COUNT.isdigit() else None,
+        shard_ids=SHARD_IDS
+    )
+else:
+    bot = commands.Bot(command_prefix="!", intents=intents, tree_cls=RPSTree)
 
+# Defaults for every guild; admins change their own guild's with /rps_config
 RESTRICTED_CHANNELS = {
     1403629262715617321,
     1403628570013601893,
@@ -40,13 +115,45 @@ RESTRICTED_CHANNELS = {
     1403628617346322492
 }
 
+MATCH_TIMEOUT = 30  # seconds (entire match must finish in 30 seconds)
+MOVE_TIMEOUT = 10  # default seconds each player has to pick a move once the round's prompt is sent
+TIE_LIMIT = 7  # total ties that end the match in a draw
+MIN_WINS, MAX_WINS = 1, 10  # allowed range for a match's wins
+QUEUE_TIMEOUT = 60 * 60  # seconds a queued match waits for busy players
+QUEUE_RECHECK = 15  # seconds between queue checks for players freed by other processes
+MAX_REPLAYS = 2  # drawn elimination matches are replayed this often before the higher seed advances
+DRAIN_TIMEOUT = 20  # seconds to checkpoint matches on shutdown (Render allows 30 after SIGTERM)
+REAPER_INTERVAL = 60  # seconds between sweeps for stuck matches
+REAPER_GRACE = 5 * 60  # seconds past its deadline before a match counts as stuck
+INTERACTION_LIFETIME = 15 * 60  # seconds Discord keeps an interaction token usable
+ACK_WARN = 2  # seconds from click to acknowledgement before it's logged as slow (Discord allows 3)
+MAX_QUEUED = 10  # moves a player can queue up ahead of their prompts
+FEED_LINES = 12  # results kept on a spectator feed message
+BULK_CONCURRENCY = 5  # matches a bulk admin command works on at once
+WEBHOOK_NAME = "RPSL Scorekeeper"  # Identity scoreboards are posted under when a guild turns webhooks on
+SCOREBOARD_IMAGE = "scoreboard.png"  # Attachment name of the move history when a guild turns images on
+FEED_INTERVAL = 5  # seconds a spectator feed collects results before editing its message
+TRACE_LIMIT = 60 * 60  # seconds allocation tracing stays on after /rps_memory starts it
+LEASE_TTL = 2 * 60  # seconds a lease outlives a process that stopped renewing it (one that crashed)
+LEASE_RENEW = 30  # seconds between lease renewals and sweeps for checkpointed work nobody owns
+MATCH_CANCELLED = -1  # Returned by start_match/run_match for a match cancel_match stopped (None is a draw)
+MATCH_NOT_PLAYED = -2  # Returned by start_match/run_match for a match that ended without a round played
+
+# Read from disk in setup_hook, so importing this module doesn't create the database
+guild_configs = ConfigStore(
+    os.getenv("GUILD_CONFIG_PATH", "guild_config.db"),
+    GuildConfig(frozenset(RESTRICTED_CHANNELS), TIE_LIMIT, MIN_WINS, MAX_WINS, MATCH_TIMEOUT, MOVE_TIMEOUT, False, False)
+)
+
 @bot.tree.command(name="rps_start", description="Start a Rock Paper Scissors game between two users (anyone can use, except in restricted channels)")
 @app_commands.describe(
     player1="Away Team player",
     player2="Home Team player",
     wins="Number of wins required to win the match",
     desc="Short description (e.g. 'Week 1 Game 1')",
-    channel="Channel to keep the scores in"
+    channel="Channel to keep the scores in",
+    queue="If a player is already in a match, start this one when they're free",
+    thread="Keep this match's scoreboard in its own thread under the score channel"
 )
 async def rps_start(
     interaction: discord.Interaction,
@@ -54,16 +161,19 @@ async def rps_start(
     player2: discord.User,
     wins: int,
     desc: str = "",
-    channel: Optional[discord.TextChannel] = None
+    channel: Optional[discord.TextChannel] = None,
+    queue: bool = False,
+    thread: bool = False
 ):
     # Validation
     if player1.bot or player2.bot:
         return await interaction.response.send_message(
             "You can't include bots as players!", ephemeral=True
         )
-    if wins < 1 or wins > 10:
+    config = guild_configs.get(interaction.guild_id)
+    if wins < config.min_wins or wins > config.max_wins:
         return await interaction.response.send_message(
-            "Please choose a number of wins between 1 and 10", ephemeral=True
+            f"Please choose a number of wins between {config.min_wins} and {config.max_wins}", ephemeral=True
         )
     # Require channel argument
     if not channel or not isinstance(channel, discord.TextChannel):
@@ -72,322 +182,928 @@ async def rps_start(
             ephemeral=True
         )
     # Restrict usage in certain channels
-    if channel.id in RESTRICTED_CHANNELS:
+    if channel.id in config.restricted_channels:
         return await interaction.response.send_message(
             f"❌ You cannot start games in {channel.mention} with this command!",
             ephemeral=True
         )
-    # Track the active match at start
-    active_matches[channel.id] = {
+    await start_match(interaction, player1, player2, wins, desc, channel, queue, thread=thread)
+
+def new_match(
+    interaction: Optional[discord.Interaction],
+    player1: discord.User,
+    player2: discord.User,
+    wins: int,
+    desc: str,
+    channel: discord.TextChannel,
+    match_id: Optional[str] = None,
+    bracket_id: Optional[str] = None
+) -> dict:
+    """Build the tracking entry for a match (see active_matches)"""
+    config = guild_configs.get(channel.guild.id)  # Settings are fixed for the match once it starts
+    return {
+        "id": match_id or uuid.uuid4().hex[:8],
+        "bracket_id": bracket_id,
         "interaction": interaction,
+        "users": [player1, player2],
         "players": [player1.id, player2.id],
+        "guild_id": channel.guild.id,
+        "channel_id": channel.id,
+        "channel": channel,  # Where scores are posted: the score channel, or the match's thread
+        "thread": None,  # The match's own thread, if it has one
+        "wins": wins,
+        "desc": desc,
+        "score": [0, 0],
+        "ties": 0,
+        "moves": [[], []],  # Stores all moves per player (e.g., ["🪨", "📄", "✂️"])
+        "round": 1,
+        "result_text": "",
         "start_time": datetime.now(),
-        "message": None  # Will store the scoreboard message
+        "timeout": config.match_timeout,
+        "deadline": datetime.now() + timedelta(seconds=config.match_timeout),
+        "tie_limit": config.tie_limit,
+        "move_timeout": config.move_timeout,
+        "ended": False,
+        "suspended": False,  # Set when the match is checkpointed for a shutdown
+        "cancelled": False,  # Set by cancel_match; run_match then returns without posting anything
+        "tasks": [],  # play_rounds and match timer tasks, cancelled by cancel_match
+        "views": [],  # This round's RPSViews
+        "prompts": [None, None],  # This round's move-request DMs (None if not sent)
+        "queued_moves": [deque(), deque()],  # Moves each player submitted ahead of time, played before prompting
+        "message": None,  # Will store the scoreboard message
+        "canvas": None,  # scoreboard_image.MoveCanvas with the rounds drawn so far, if the guild uses images
+        "board": None  # Last scoreboard embed sent (as a dict), so unchanged boards aren't re-sent
     }
 
-    # Announce match
-    await interaction.response.send_message(
-        f"🎮 **RPS Match Started!**\n"
-        f"Away: {player1.mention}  vs  Home: {player2.mention}\n"
-        f"First to {wins} wins, first to 7 total ties ends in a draw.\n"
-        f"{f'**Match:** {desc}' if desc else ''}\n"
-        f"⏳ You have 36 hours to play!\n"
-        f"Scores will be kept in {channel.mention}"
-    )
+def match_record(match: dict) -> dict:
+    """JSON-safe copy of a match for the shared store"""
+    return {
+        "id": match["id"],
+        "players": list(match["players"]),
+        "guild_id": match["guild_id"],
+        "channel_id": match["channel_id"],
+        "wins": match["wins"],
+        "tie_limit": match["tie_limit"],
+        "move_timeout": match["move_timeout"],
+        "desc": match["desc"],
+        "score": list(match["score"]),
+        "ties": match["ties"],
+        "moves": [list(m) for m in match["moves"]],
+        "round": match["round"],
+        "result_text": match["result_text"],
+        "start_time": match["start_time"].timestamp(),
+        "elapsed": (datetime.now() - match["start_time"]).total_seconds(),
+        "time_left": (match["deadline"] - datetime.now()).total_seconds(),
+        "deadline": match["deadline"].timestamp(),
+        "pending_moves": [view.choice for view in match["views"]] or [None, None],
+        "queued_moves": [list(queue) for queue in match["queued_moves"]],
+        "bracket_id": match["bracket_id"],
+        "suspended": match["suspended"],
+        "message_id": match["message"].id if match["message"] else None,
+        "thread_id": match["thread"].id if match["thread"] else None
+    }
 
-    # Initialize tracking
-    score = {player1.id: 0, player2.id: 0, "ties": 0}
-    move_history = {player1.id: [], player2.id: []}  # Stores all moves (e.g., ["✊", "✋", "✌️"])
-    last_move = {player1.id: "❔", player2.id: "❔"}
-    round_num = 1
-    scoreboard_message: Optional[discord.Message] = None
-
-    result_text = ""
-    def make_summary(final=False) -> str:
-        header = f"**{desc}**\n" if desc else ""
-        moves_text = (
-            f"**Moves:**\n"
-            f"{player1.mention}: {', '.join(move_history[player1.id])}\n"
-            f"{player2.mention}: {', '.join(move_history[player2.id])}\n\n"
-        )
-        score_text = (
-            f"**Score:** {player1.mention}: {score[player1.id]} | "
-            f"{player2.mention}: {score[player2.id]} | "
-            f"Ties: {score['ties']}\n\n"
-        )
-        # Calculate elapsed time
-        elapsed = (datetime.now() - active_matches[channel.id]["start_time"]).total_seconds() if channel.id in active_matches else 0
-        duration_text = f"⏱️ Match duration: {int(elapsed)} seconds\n\n"
-        base = f"{header}{moves_text}{score_text}{duration_text}{result_text}"
-        if final:
-            if score["ties"] >= 7:  # If ties reached 7, it's an automatic draw
-                base += "\n\n🤝 **Match ends in a draw due to too many ties!**"
-            elif score[player1.id] > score[player2.id]:
-                base += f"\n\n🎉 **{player1.mention} wins the match!**"
-            elif score[player2.id] > score[player1.id]:
-                base += f"\n\n🎉 **{player2.mention} wins the match!**"
-            else:
-                base += "\n\n🤝 **Match ends in a draw!**"
-        return base
+async def start_match(
+    interaction: Optional[discord.Interaction],
+    player1: discord.User,
+    player2: discord.User,
+    wins: int,
+    desc: str,
+    channel: discord.TextChannel,
+    queue: bool = False,
+    match_id: Optional[str] = None,
+    bracket_id: Optional[str] = None,
+    thread: bool = False
+) -> Optional[int]:
+    """Register a validated match, announce it and play it out.
+
+    interaction is None for matches the bot starts itself (brackets); messages then go to channel.
+    """
+    if shutting_down:
+        return None
+    for user in (player1, player2):
+        user_cache.put(user)
+    match = new_match(interaction, player1, player2, wins, desc, channel, match_id, bracket_id)
+    # Lock both players to this match before any DMs go out
+    busy = await store.claim_players(match["id"], match["players"])
+    if busy:
+        busy_text = " and ".join(f"<@{pid}>" for pid in busy)
+        if not queue:
+            await respond(
+                interaction, channel,
+                f"❌ {busy_text} {'is' if len(busy) == 1 else 'are'} already in a match! "
+                f"Use `queue: True` to start this one when they're free.",
+                ephemeral=True
+            )
+            return MATCH_NOT_PLAYED
+        if any(set(m["players"]) == set(match["players"]) for m in waiting_matches):
+            await respond(interaction, channel, "❌ A match between these players is already queued!", ephemeral=True)
+            return MATCH_NOT_PLAYED
+        await respond(
+            interaction, channel,
+            f"⏳ {busy_text} {'is' if len(busy) == 1 else 'are'} already in a match. "
+            f"This match will start automatically when they're free."
+        )
+        if not await wait_for_players(match):
+            await channel.send(
+                f"⌛ Queued match between {player1.mention} and {player2.mention} expired before both players were free."
+            )
+            return MATCH_NOT_PLAYED
+        if shutting_down:
+            await store.release_players(match["id"], match["players"])
+            return None
+        match["start_time"] = datetime.now()
+        match["deadline"] = match["start_time"] + timedelta(seconds=match["timeout"])
+    # Players in a match can't also wait for one
+    for pid in match["players"]:
+        leave_matchmaking(pid)
 
-    # Main game loop
+    # Track the active match at start
+    active_matches[match["id"]] = match
+    try:
+        # Announce match; answer the interaction first, since creating a thread can wait on its rate limit
+        announcement = (
+            f"🎮 **RPS Match Started!**\n"
+            f"Away: {player1.mention}  vs  Home: {player2.mention}\n"
+            f"First to {wins} wins, first to {match['tie_limit']} total ties ends in a draw.\n"
+            f"{f'**Match:** {desc}' if desc else ''}\n"
+            f"⏳ You have {duration_text(match['timeout'])} to play!\n"
+            f"Scores will be kept in {'a thread under ' if thread else ''}{match['channel'].mention}"
+        )
+        await respond(interaction, channel, announcement)
+        if thread:
+            await open_match_thread(match)
+        await store.save_match(match_record(match))
+        post_to_feeds(match, f"🎮 `{match['id']}` {player1.mention} vs {player2.mention} started{f': {desc}' if desc else ''}")
+    except Exception:
+        # run_match's cleanup never runs for a match that failed to start
+        await end_match(match)
+        raise
+    return await run_match(match)
+
+async def open_match_thread(match: dict):
+    """Give the match its own thread under the score channel; threads have their own rate limits"""
+    name = f"{match['desc'] or 'RPS'}: {user_cache.name(match['players'][0])} vs {user_cache.name(match['players'][1])}"
+    try:
+        match["thread"] = await match["channel"].create_thread(
+            name=name[:100], type=discord.ChannelType.public_thread, auto_archive_duration=1440
+        )
+    except discord.HTTPException as e:
+        logging.warning("Couldn't open a thread for match %s, using the score channel: %s", match["id"], e)
+        return
+    match["channel"] = match["thread"]
 
-    # MATCH TIMER LOGIC
-    MATCH_TIMEOUT = 30  # seconds (entire match must finish in 30 seconds)
-    match_task = asyncio.create_task(asyncio.sleep(MATCH_TIMEOUT))
-    match_ended = False
+async def close_match_thread(match: dict):
+    """Post the result in the parent channel and archive the match's thread"""
+    thread = match["thread"]
+    header = f"**{match['desc']}**: " if match["desc"] else ""
+    score = match["score"]
+    try:
+        await thread.parent.send(f"🏁 {header}{match_outcome(match)} ({score[0]}-{score[1]}) {thread.mention}")
+        await thread.edit(archived=True)
+    except discord.HTTPException as e:
+        logging.warning("Couldn't close the thread for match %s: %s", match["id"], e)
+
+async def respond(interaction: Optional[discord.Interaction], channel: discord.abc.Messageable, content: str, ephemeral=False):
+    """Answer the interaction if it hasn't been answered yet, otherwise post in channel"""
+    if interaction is not None and not interaction.response.is_done():
+        await interaction.response.send_message(content, ephemeral=ephemeral)
+    else:
+        # Queued or bot-started match: the interaction was already used (and may have expired)
+        await channel.send(content)
 
-    async def play_match():
-        nonlocal round_num, scoreboard_message, match_ended
-        while True:
-            # Prevent starting a new round if match ended (timed out)
-            if match_ended:
-                break
-            # Check win conditions
-            if score[player1.id] >= wins or score[player2.id] >= wins or score["ties"] >= 7:
+async def wait_for_players(match: dict) -> bool:
+    """Wait in the queue until both players can be claimed; False if QUEUE_TIMEOUT passes first"""
+    waiting_matches.append(match)
+    deadline = asyncio.get_running_loop().time() + QUEUE_TIMEOUT
+    try:
+        async with players_freed:
+            while await store.claim_players(match["id"], match["players"]):
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    return False
+                try:
+                    # Woken by end_match; the recheck interval covers matches ended by other processes
+                    await asyncio.wait_for(players_freed.wait(), timeout=min(remaining, QUEUE_RECHECK))
+                except asyncio.TimeoutError:
+                    pass
+        return True
+    finally:
+        waiting_matches.remove(match)
+
+def make_scoreboard(match: dict, final=False, note: str = "") -> discord.Embed:
+    return discord.Embed.from_dict(scoreboard(match, final, note))
+
+async def wait_for_moves(match: dict, views: list):
+    """Wait until both players moved or the move clock runs out; a missing move stays None (forfeit)"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + match["move_timeout"]
+    move_tasks = [asyncio.create_task(view.wait()) for view in views]
+    try:
+        # Returns as soon as both moves are in, otherwise wakes up twice a second
+        while not all(t.done() for t in move_tasks):
+            remaining = deadline - loop.time()
+            if match["ended"] or remaining <= 0:
                 break
+            await asyncio.wait(move_tasks, timeout=min(0.5, remaining))
+            # DM clicks land on shard 0, which may be another process; it records them in the store
+            remote = await store.get_moves(match["id"], match["round"])
+            for view in views:
+                if view.choice is None and view.player.id in remote:
+                    view.choice = remote[view.player.id]
+                    view.stop()
+    finally:
+        # Nothing keeps waiting on (or routing clicks to) this round's views
+        for task in move_tasks:
+            task.cancel()
+        for view in views:
+            view.stop()
+
+async def close_prompts(match: dict):
+    """Take the buttons off move requests nobody answered; answered ones were edited by the click itself"""
+    async def close(prompt: discord.Message):
+        try:
+            await outbound.run(PROMPT, lambda: prompt.edit(content=f"{prompt.content}\n⌛ Time's up - no move this round.", view=None))
+        except discord.HTTPException:
+            pass
+    await asyncio.gather(*(
+        close(prompt) for prompt, view in zip(match["prompts"], match["views"])
+        if prompt is not None and view.choice is None
+    ))
+
+async def play_rounds(match: dict):
+    player1, player2 = match["users"]
+    score = match["score"]
+    while True:
+        # Prevent starting a new round if match ended (timed out)
+        if match["ended"]:
+            break
+        # Check win conditions
+        if score[0] >= match["wins"] or score[1] >= match["wins"] or match["ties"] >= match["tie_limit"]:
+            break
+        round_num = match["round"]
+        await store.save_match(match_record(match))
+
+        # Get player moves
+        view1 = RPSView(player1, match["id"], round_num, match["move_timeout"])
+        view2 = RPSView(player2, match["id"], round_num, match["move_timeout"])
+        match["views"] = [view1, view2]
+        match["prompts"] = [None, None]
+        # Moves made before a restart carry over into the resumed round
+        pending_moves = list(match.pop("pending_moves", None) or [None, None])
+        # Then moves queued up ahead of time, which skip the prompt entirely
+        for idx, queue in enumerate(match["queued_moves"]):
+            if not pending_moves[idx] and queue:
+                pending_moves[idx] = queue.popleft()
+
+        # Send move requests
+        try:
+            for idx, (player, view, move) in enumerate(zip((player1, player2), match["views"], pending_moves)):
+                if move:
+                    view.choice = move
+                    view.stop()
+                    continue
+                dm = await player.create_dm()
+                match["prompts"][idx] = await outbound.run(PROMPT, lambda: dm.send(
+                    f"**Round {round_num}:** Select your move (you have {duration_text(match['move_timeout'])}):", view=view
+                ))
+        except discord.Forbidden:
+            warning = f"⚠️ Couldn't DM players. Please enable DMs from server members."
+            if match["interaction"] is not None:
+                await match["interaction"].followup.send(warning, ephemeral=True)
+            else:
+                await match["channel"].send(warning)
+            match["ended"] = True
+            return
+
+        # Wait for moves until the move clock runs out, but break if match timer is done
+        await wait_for_moves(match, [view1, view2])
+        if not match["suspended"]:  # suspend_match closes them with its own note
+            await close_prompts(match)
+        # If match ended during waiting, break before recording moves or updating scoreboard
+        if match["ended"]:
+            break
+        # Record moves
+        m1, m2 = view1.choice, view2.choice
+        match["views"] = []
+        match["prompts"] = [None, None]
+
+        # Update move history, score and result text
+        resolve_round(match, m1, m2)
+        round_log.info(
+            "Round %d: %s vs %s", round_num, m1, m2,
+            extra={"event": "round", "round": round_num, "moves": [m1, m2], "score": list(score), "ties": match["ties"]}
+        )
+        post_to_feeds(
+            match,
+            f"`{match['id']}` R{round_num}: {player1.mention} {match['moves'][0][-1]} vs "
+            f"{match['moves'][1][-1]} {player2.mention} ({score[0]}-{score[1]})"
+        )
 
-            # Get player moves
-            moves = {}
-            view1 = RPSView(player1)
-            view2 = RPSView(player2)
+        match["round"] += 1
+        if all(match["queued_moves"]):
+            # The next round plays itself from both queues too: hold the updates until someone is prompted
+            continue
 
-            # Send move requests
-            try:
-                dm1 = await player1.create_dm()
-                dm_msg1 = await dm1.send(f"**Round {round_num}:** Select your move:", view=view1)
-
-                dm2 = await player2.create_dm()
-                dm_msg2 = await dm2.send(f"**Round {round_num}:** Select your move:", view=view2)
-            except discord.Forbidden:
-                await interaction.followup.send(
-                    f"⚠️ Couldn't DM players. Please enable DMs from server members.",
-                    ephemeral=True
-                )
-                match_ended = True
-                return
+        # Update scoreboard
+        board = make_scoreboard(match)
+        await update_scoreboard(match, board)
 
-            # Wait for moves, but break if match timer is done
-            move_tasks = [asyncio.create_task(view1.wait()), asyncio.create_task(view2.wait())]
-            done, pending = await asyncio.wait(move_tasks, timeout=1)
-            # If match timer expired, break out of loop
-            if match_ended:
-                break
-            # If both moves are done, continue; else, keep waiting until match timer expires
-            while not all(t.done() for t in move_tasks):
-                await asyncio.sleep(0.5)
-                if match_ended:
-                    break
-            # If match ended during waiting, break before recording moves or updating scoreboard
-            if match_ended:
-                break
-            # Record moves
-            moves[player1.id] = view1.choice
-            moves[player2.id] = view2.choice
-
-            # Update last move display
-            for pid, move in moves.items():
-                emoji = next(
-                    (emoji for emoji, name in EMOJI_TO_MOVE.items() if name == move),
-                    "❌" if move is None else "❔"
-                )
-                move_history[pid].append(emoji)  # Add to history
-                last_move[pid] = emoji  # Still track latest move for round results
-
-            # Determine round result
-            m1, m2 = moves[player1.id], moves[player2.id]
-            if m1 is None and m2 is None:
-                score["ties"] += 1
-                result_text = "Both players failed to play - round counted as tie."
-            elif m1 is None:
-                score[player2.id] += 1
-                result_text = f"{player2.mention} wins the round {player1.mention} failed to play."
-            elif m2 is None:
-                score[player1.id] += 1
-                result_text = f"{player1.mention} wins the round {player2.mention} failed to play."
-            else:
-                winner = determine_winner(m1, m2)
-                if winner == 1:
-                    score[player1.id] += 1
-                    result_text = f"{player1.mention} wins the round!"
-                elif winner == 2:
-                    score[player2.id] += 1
-                    result_text = f"{player2.mention} wins the round!"
-                else:
-                    score["ties"] += 1
-                    result_text = "Round is a tie."
-
-            # Update scoreboard
-            summary = make_summary()
+        # Send updates to players; nice to have, so the next round doesn't wait for them
+        for p, queue in zip((player1, player2), match["queued_moves"]):
+            if queue:  # Not prompted next round either; they'll hear once their queue runs out
+                continue
+            dm = await p.create_dm()
+            # Bound now: the worker runs this after later rounds have moved round_num and board on
+            outbound.post(
+                INFO,
+                lambda dm=dm, text=f"**Round {round_num} Update** - next round starting soon...", board=board: dm.send(text, embed=board),
+                droppable=True
+            )
+
+async def update_scoreboard(match: dict, embed: discord.Embed):
+    """Edit the match's scoreboard message, posting a new one if needed; no-op if nothing changed"""
+    board = embed.to_dict()
+    if board == match["board"] and match["message"] is not None:
+        return
+    image = await scoreboard_image(match)
+    if image is not None:
+        embed = with_image(embed)
+    try:
+        if match["message"] is None:
+            match["message"] = await outbound.run(SCOREBOARD, lambda: post_scoreboard(match, embed, image))
+        else:
+            # Webhook messages are edited through their webhook, so this uses the same bucket they were posted in
+            await outbound.run(SCOREBOARD, lambda: match["message"].edit(embed=embed, attachments=scoreboard_files(image)))
+    except (discord.NotFound, discord.HTTPException):
+        match["message"] = await outbound.run(SCOREBOARD, lambda: post_scoreboard(match, embed, image))
+    match["board"] = board
+
+async def scoreboard_image(match: dict) -> Optional[bytes]:
+    """PNG of the whole move history if the match's guild turned image scoreboards on; None keeps the emoji strip"""
+    if not guild_configs.get(match["guild_id"]).image_scoreboards:
+        return None
+    try:
+        # Imported here so Pillow is only needed once a guild turns images on
+        import scoreboard_image as images
+    except ImportError:  # /rps_config refuses to turn images on without Pillow, but another process may have it
+        return None
+    if match["canvas"] is None:
+        names = [(await get_user_info(pid)).display_name for pid in match["players"]]
+        match["canvas"] = images.MoveCanvas(names)
+    try:
+        return await images.render(match["canvas"], match["moves"])
+    except Exception as e:
+        logging.error("Couldn't render the scoreboard image for %s", match["id"], exc_info=e)
+        return None
+
+def with_image(embed: discord.Embed) -> discord.Embed:
+    """A copy of the scoreboard showing the attached move history in place of the emoji strip"""
+    embed = embed.copy()
+    for index, field in enumerate(embed.fields):
+        if field.name == "Moves":
+            embed.remove_field(index)
+            break
+    return embed.set_image(url=f"attachment://{SCOREBOARD_IMAGE}")
+
+def scoreboard_files(image: Optional[bytes]) -> list:
+    """Attachments for a scoreboard message; a fresh File every call, since sending one consumes it"""
+    return [discord.File(io.BytesIO(image), filename=SCOREBOARD_IMAGE)] if image else []
+
+async def post_scoreboard(match: dict, embed: discord.Embed, image: Optional[bytes] = None) -> discord.Message:
+    """Post a new scoreboard, through the channel's scorekeeper webhook if the guild turned them on"""
+    channel = match["channel"]
+    if guild_configs.get(match["guild_id"]).webhook_scoreboards and isinstance(channel, (discord.TextChannel, discord.Thread)):
+        hook = await scoreboard_webhook(channel)
+        if hook is not None:
             try:
-                if scoreboard_message is None:
-                    scoreboard_message = await send_to_channel(interaction, summary)
-                else:
-                    await scoreboard_message.edit(content=summary)
-            except (discord.NotFound, discord.HTTPException):
-                scoreboard_message = await send_to_channel(interaction, summary)
-
-            # Send updates to players
-            for p in (player1, player2):
-                try:
-                    dm = await p.create_dm()
-                    await dm.send(
-                        f"**Round {round_num} Update**\n"
-                        f"{summary}\n\n"
-                        f"Next round starting soon..."
+                thread = channel if isinstance(channel, discord.Thread) else discord.utils.MISSING
+                return await hook.send(embed=embed, files=scoreboard_files(image), thread=thread, wait=True)
+            except discord.NotFound:
+                # Someone deleted it; a fresh one is made next time
+                scoreboard_webhooks.pop(hook.channel_id, None)
+    return await send_match_message(match, embed=embed, image=image)
+
+async def scoreboard_webhook(channel) -> Optional[discord.Webhook]:
+    """The bot's scorekeeper webhook for a channel (threads use their parent's), created on first use"""
+    parent = channel.parent if isinstance(channel, discord.Thread) else channel
+    if parent.id in scoreboard_webhooks:
+        return scoreboard_webhooks[parent.id]
+    async with webhook_lock:
+        if parent.id not in scoreboard_webhooks:
+            try:
+                hook = next((h for h in await parent.webhooks() if h.user == bot.user and h.name == WEBHOOK_NAME), None)
+                if hook is None:
+                    hook = await parent.create_webhook(
+                        name=WEBHOOK_NAME, avatar=await bot.user.display_avatar.read(), reason="RPS scoreboards"
                     )
-                except discord.Forbidden:
-                    continue
-
-            round_num += 1
+            except discord.HTTPException as e:
+                # Usually a missing Manage Webhooks permission; the bot posts itself until /rps_config changes
+                logging.warning("No scoreboard webhook in %s, posting as the bot: %s", parent.id, e)
+                hook = None
+            scoreboard_webhooks[parent.id] = hook
+    return scoreboard_webhooks[parent.id]
+
+async def match_clock(match: dict):
+    """Sleep until the match's deadline, following it if /rps_extend moves it"""
+    while (remaining := (match["deadline"] - datetime.now()).total_seconds()) > 0:
+        await asyncio.sleep(remaining)
+
+async def run_match(match: dict) -> Optional[int]:
+    """Play a registered match to the end; returns the winner's id (None for a draw, MATCH_CANCELLED if cancelled,
+    MATCH_NOT_PLAYED if not a single round was played, e.g. because a player blocks DMs)"""
+    player1, player2 = match["users"]
+    match_id_var.set(match["id"])  # The tasks below inherit it, so their log records are tagged too
+
+    if match["cancelled"]:  # Cancelled while it was being announced
+        return MATCH_CANCELLED
 
     # Run match and timer concurrently
-    play_task = asyncio.create_task(play_match())
+    match_task = asyncio.create_task(match_clock(match))
+    play_task = asyncio.create_task(play_rounds(match))
+    match["tasks"] = [play_task, match_task]
     done, pending = await asyncio.wait([play_task, match_task], return_when=asyncio.FIRST_COMPLETED)
+    if play_task in done and not play_task.cancelled() and play_task.exception():
+        # Still finish below so the match is announced and cleaned up
+        logging.error("Match %s crashed", match["id"], exc_info=play_task.exception())
+
+    if match["cancelled"]:
+        # cancel_match already stopped the tasks and cleaned up
+        return MATCH_CANCELLED
+    if match["suspended"]:
+        # Shutting down: the checkpoint in the store resumes this match on the next start
+        match_task.cancel()
+        active_matches.pop(match["id"], None)
+        return None
 
-    # If match timer expired before match ended
-    if match_task in done and not play_task.done():
-        match_ended = True
-        # End match and declare winner
-        # If one player has more points, they win; if tied, it's a draw
-        final_summary = make_summary(final=True)
-        if score[player1.id] > score[player2.id]:
-            final_summary += f"\n\n⏰ **Match timer expired! {player1.mention} wins by score!**"
-        elif score[player2.id] > score[player1.id]:
-            final_summary += f"\n\n⏰ **Match timer expired! {player2.mention} wins by score!**"
+    try:
+        # If match timer expired before match ended
+        if match_task in done and not play_task.done():
+            match["ended"] = True
+            # End match and declare winner
+            # If one player has more points, they win; if tied, it's a draw
+            final_board = make_scoreboard(match, final=True, note="⏰ **Match timer expired!** Decided by score.")
+
+            # Always send a new message to the channel to announce match end
+            try:
+                await send_match_message(match, "**⏰ Match Ended Due to Timer!**", embed=final_board)
+            except Exception as e:
+                logging.error("Failed to send end message to channel: %s", e)
         else:
-            final_summary += "\n\n⏰ **Match timer expired! It's a draw!**"
-
-        # Add total match duration to the end message
-        elapsed = (datetime.now() - active_matches[channel.id]["start_time"]).total_seconds() if channel.id in active_matches else 0
-        final_summary += f"\n\n⏱️ Match lasted {int(elapsed)} seconds"
-
-        # Always send a new message to the channel to announce match end
-        try:
-            await send_to_channel(interaction, f"**⏰ Match Ended Due to Timer!**\n{final_summary}")
-        except Exception as e:
-            logging.error(f"Failed to send end message to channel: {e}")
+            # If match finished normally
+            match_task.cancel()
+            final_board = make_scoreboard(match, final=True)
+            await update_scoreboard(match, final_board)
+        post_to_feeds(match, f"🏁 `{match['id']}` {match_outcome(match)}")
+        if match["thread"] is not None:
+            await close_match_thread(match)
 
         # Also DM both players
         for p in (player1, player2):
-            try:
-                dm = await p.create_dm()
-                await dm.send(f"**Match Complete!**\n{final_summary}")
-            except discord.Forbidden:
-                continue
-        if channel.id in active_matches:
-            del active_matches[channel.id]
-        return
-
-    # If match finished normally
-    final_summary = make_summary(final=True)
-    try:
-        if scoreboard_message is not None:
-            await scoreboard_message.edit(content=final_summary)
-        else:
-            scoreboard_message = await send_to_channel(interaction, final_summary)
-    except (discord.NotFound, discord.HTTPException):
-        scoreboard_message = await send_to_channel(interaction, final_summary)
-    for p in (player1, player2):
+            dm = await p.create_dm()
+            outbound.post(INFO, lambda dm=dm: dm.send("**Match Complete!**", embed=final_board))
+        # Cancelled matches and ones where no round was played don't count
+        if match["id"] in active_matches and match["round"] > 1:
+            await record_ratings(match)
+    finally:
+        await end_match(match)
+    return match_winner(match) if match["round"] > 1 else MATCH_NOT_PLAYED
+
+async def suspend_match(match: dict):
+    """Checkpoint a running match for shutdown and tell everyone it will resume"""
+    match["suspended"] = True
+    match["ended"] = True  # Stops play_rounds before its next step
+    await store.save_match(match_record(match))
+    # The buttons die with this process, so take them off the open move requests
+    for prompt, view in zip(match["prompts"], match["views"]):
+        if prompt is None or view.choice is not None:  # Answered moves carry over
+            continue
+        try:
+            await prompt.edit(content=f"{prompt.content}\n⏸️ Paused for a bot restart - this round will be sent again.", view=None)
+        except discord.HTTPException:
+            pass
+    # Flush the latest scoreboard
+    await update_scoreboard(match, make_scoreboard(match, note="⏸️ **Match paused for a bot restart - it will resume automatically.**"))
+    for p in match["users"]:
         try:
             dm = await p.create_dm()
-            await dm.send(f"**Match Complete!**\n{final_summary}")
+            await dm.send("⏸️ The bot is restarting. Your match is saved and will resume automatically in a moment.")
         except discord.Forbidden:
             continue
-    if channel.id in active_matches:
-        del active_matches[channel.id]
-async def send_to_channel(interaction: discord.Interaction, content: str) -> discord.Message:
-    """Safely send a message to the interaction's channel with fallbacks"""
-    # Always send to the score-keeping channel if available
-    channel_id = None
-    if hasattr(interaction, 'channel') and interaction.channel:
-        channel_id = interaction.channel.id
-    # Try to use the active match's channel if possible
-    if channel_id and channel_id in active_matches:
-        score_channel = interaction.guild.get_channel(channel_id) if interaction.guild else None
-        if score_channel and isinstance(score_channel, (discord.TextChannel, discord.Thread)):
-            return await score_channel.send(content)
-    # Fallback to original logic
-    if interaction.channel and isinstance(interaction.channel, (discord.TextChannel, discord.Thread)):
-        return await interaction.channel.send(content)
-    
+
+async def abandon_match(match: dict):
+    """End a running match for shutdown when the store can't keep it for the next process"""
+    note = "🛑 **Match ended by a bot restart** - nothing is saved between restarts here, so start a new one once the bot is back."
+    await update_scoreboard(match, make_scoreboard(match, final=True, note=note))
+    await cancel_match(match, note)
+
+async def resume_match(record: dict) -> Optional[int]:
+    """Continue a match checkpointed by suspend_match"""
+    channel = bot.get_channel(record["channel_id"])
+    if not isinstance(channel, discord.TextChannel):
+        logging.error("Dropping checkpointed match %s: channel %s is gone", record["id"], record["channel_id"])
+        await store.delete_match(record["id"])
+        await drop_lease(f"match:{record['id']}")
+        return None
+    users = [await get_player(pid) for pid in record["players"]]
+    match = new_match(None, users[0], users[1], record["wins"], record["desc"], channel, record["id"], record["bracket_id"])
+    now = datetime.now()
+    match.update(
+        score=record["score"],
+        ties=record["ties"],
+        tie_limit=record.get("tie_limit", match["tie_limit"]),
+        move_timeout=record.get("move_timeout", match["move_timeout"]),
+        moves=record["moves"],
+        round=record["round"],
+        result_text=record["result_text"],
+        start_time=now - timedelta(seconds=record["elapsed"]),
+        deadline=now + timedelta(seconds=record["time_left"]),
+        pending_moves=record["pending_moves"],
+        queued_moves=[deque(queue) for queue in record.get("queued_moves", [[], []])]
+    )
+    if record.get("thread_id"):
+        thread = channel.get_thread(record["thread_id"])
+        if thread is not None:
+            match["thread"] = match["channel"] = thread
+    if record["message_id"]:
+        try:
+            match["message"] = await match["channel"].fetch_message(record["message_id"])
+        except discord.HTTPException:
+            pass
+    active_matches[match["id"]] = match
+    try:
+        await store.save_match(match_record(match))  # Clears the suspended flag
+        header = f"**{match['desc']}**: " if match["desc"] else ""
+        await match["channel"].send(
+            f"▶️ Resuming {header}{users[0].mention} vs {users[1].mention} "
+            f"from round {match['round']} after a bot restart."
+        )
+    except Exception:
+        await end_match(match)
+        raise
+    return await run_match(match)
+
+async def resume_matches():
+    """Resume checkpointed matches for guilds this process serves; bracket matches resume with their bracket"""
+    if shutting_down:
+        return
+    for record in await store.list_matches():
+        if not record.get("suspended") or record["bracket_id"] or record["id"] in active_matches:
+            continue
+        match_id = record["id"]
+        if f"match:{match_id}" in held_leases:
+            continue  # Already being resumed here
+        if not bot.get_guild(record["guild_id"]) or not await take_lease(f"match:{match_id}"):
+            continue  # Another process serves the guild or is already resuming the match
+        # It may have been resumed (or finished) elsewhere between the listing and the lease
+        record = await store.get_match(match_id)
+        if record and record.get("suspended"):
+            asyncio.create_task(resume_match(record))
+        else:
+            await drop_lease(f"match:{match_id}")
+
+async def shutdown():
+    """Stop taking commands, checkpoint (or, with nowhere to keep them, end) every running match and close the bot within DRAIN_TIMEOUT"""
+    global shutting_down
+    shutting_down = True
+    keep_leases.cancel()
+    drain = suspend_match if store.persistent else abandon_match
+    logging.info("Shutting down: %s %d match(es)", "checkpointing" if store.persistent else "ending", len(active_matches))
+    # Bracket progress is saved after every result; their running matches are checkpointed below
+    for task in list(running_brackets.values()):
+        task.cancel()
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(drain(m) for m in list(active_matches.values())), return_exceptions=True),
+            timeout=DRAIN_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        logging.warning("Drain window ran out before every match was checkpointed")
+    # Everything is checkpointed, so the next process can take over right away instead of after LEASE_TTL
+    await asyncio.gather(*(drop_lease(name) for name in list(held_leases)), return_exceptions=True)
+    await store.checkpoint()
+    await bot.close()
+
+def request_shutdown():
+    global shutdown_task
+    if shutdown_task is None:
+        shutdown_task = asyncio.create_task(shutdown())
+
+async def record_ratings(match: dict):
+    """Update both players' Elo ratings from a finished match"""
+    p1, p2 = match["players"]
+    ratings = await store.get_ratings(match["players"])
+    winner = match_winner(match)
+    result = 0.5 if winner is None else float(winner == p1)
+    new1, new2 = update_ratings(ratings.get(p1, DEFAULT_RATING), ratings.get(p2, DEFAULT_RATING), result)
+    await store.set_ratings({p1: new1, p2: new2})
+
+def leave_matchmaking(player_id: int) -> bool:
+    """Remove a player from every matchmaking pool; True if they were queued"""
+    return any([pool.remove(player_id) is not None for pool in matchmaking_pools.values()])
+
+async def cancel_match(match: dict, note: str = "🛑 This match was cancelled."):
+    """Stop a match where it stands: its tasks, its buttons and its registry entry"""
+    match["cancelled"] = True
+    match["ended"] = True
+    for task in match["tasks"]:
+        task.cancel()
+    for view in match["views"]:
+        view.stop()
+    for prompt in filter(None, match["prompts"]):
+        try:
+            await prompt.edit(content=f"{prompt.content}\n{note}", view=None)
+        except discord.HTTPException:
+            pass
+    # Let go of everything the match was holding on to
+    match["tasks"], match["views"], match["prompts"] = [], [], [None, None]
+    match["interaction"] = None
+    await end_match(match)
+
+async def end_match(match: dict):
+    """Drop a match from the local registry and the shared store, then wake queued matches"""
+    active_matches.pop(match["id"], None)
+    await store.delete_match(match["id"])
+    # delete_match only frees players it finds a record for, and save_match may never have succeeded
+    await store.release_players(match["id"], match["players"])
+    await drop_lease(f"match:{match['id']}")
+    async with players_freed:
+        players_freed.notify_all()
+
+async def take_lease(name: str) -> bool:
+    """Own a checkpointed match or a bracket across processes; False if another process does"""
+    if not await store.take_lease(name, process_id, LEASE_TTL):
+        return False
+    held_leases.add(name)
+    return True
+
+async def drop_lease(name: str):
+    if name in held_leases:
+        held_leases.discard(name)
+        await store.release_lease(name, process_id)
+
+async def get_player(user_id: int) -> discord.User:
+    """User object for DMs: the client cache when possible, the API otherwise"""
+    user = bot.get_user(user_id) or await bot.fetch_user(user_id)
+    user_cache.put(user)
+    return user
+
+async def get_user_info(user_id: int) -> UserInfo:
+    """Name/mention/avatar for rendering; only hits the API on a cache miss"""
+    return user_cache.get(user_id) or user_cache.put(await get_player(user_id))
+
+async def send_match_message(match: dict, content: Optional[str] = None, embed: Optional[discord.Embed] = None, image: Optional[bytes] = None) -> discord.Message:
+    """Post a match message in its score channel; one API call unless that channel can't be used"""
+    try:
+        return await match["channel"].send(content, embed=embed, files=scoreboard_files(image))
+    except (discord.Forbidden, discord.NotFound) as e:
+        if match["interaction"] is None:
+            raise
+        logging.warning(
+            "Can't post in score channel %s: %s", match["channel_id"], e,
+            extra={"event": "send_failed", "channel_id": match["channel_id"]}
+        )
+    message = await send_to_channel(match["interaction"], content, embed, image)
+    match["channel"] = message.channel  # Later posts go straight to wherever this one landed
+    return message
+
+async def send_to_channel(interaction: discord.Interaction, content: Optional[str], embed: Optional[discord.Embed] = None, image: Optional[bytes] = None) -> discord.Message:
+    """Fallback when the score channel is unusable: the command's channel, then the interaction followup"""
+    if isinstance(interaction.channel, (discord.TextChannel, discord.Thread)):
+        try:
+            return await interaction.channel.send(content, embed=embed, files=scoreboard_files(image))
+        except discord.HTTPException as e:
+            logging.error("Failed to send message: %s", e, extra={"event": "send_failed", "channel_id": interaction.channel_id})
+
     # If we haven't responded yet, defer first
     if not interaction.response.is_done():
         await interaction.response.defer(thinking=True)
-    
-    # Use followup with proper type handling
-    followup_msg = await interaction.followup.send(content)
-    if followup_msg is None:
-        # Final fallback - try to get channel from original response
-        try:
-            if interaction.response.is_done():
-                msg = await interaction.original_response()
-                if isinstance(msg.channel, (discord.TextChannel, discord.Thread)):
-                    return await msg.channel.send(content)
-        except Exception as e:
-            logging.error(f"Failed to send message: {e}")
-    
-    if followup_msg is None:
-        raise RuntimeError("All message sending methods failed")
-    return followup_msg
+    return await interaction.followup.send(content, embed=embed, files=scoreboard_files(image), wait=True)
 
 def is_guild_admin(interaction: discord.Interaction) -> bool:
-    guild = interaction.guild
-    if guild is None:
+    if interaction.guild_id is None:
         return False
-    member = cast(Member, interaction.user)
-    return member.guild_permissions.administrator
-
-EMOJI_TO_MOVE = {
-    "🪨": "rock",
-    "📄": "paper",
-    "✂️": "scissors"
-}
-EMOJIS = list(EMOJI_TO_MOVE.keys())
+    # Resolved by Discord for this interaction, so it doesn't need the guild's roles cached (HTTP mode)
+    return interaction.permissions.administrator
 
 class RPSView(ui.View):
-    def __init__(self, player: discord.User):
-        # UI timeout is now 5 minutes, but match timer controls the game
-        super().__init__(timeout=300)
+    def __init__(self, player: discord.User, match_id: str, round_num: int, move_timeout: int = MOVE_TIMEOUT):
+        # The round's move clock controls the game; the view timeout is only a backstop
+        super().__init__(timeout=move_timeout + 30)
         self.player = player
+        self.match_id = match_id
         self.choice = None
-    
+        # Custom ids carry the match and round so any shard process can record the click
+        for button, move in ((self.rock, "rock"), (self.paper, "paper"), (self.scissors, "scissors"), (self.queue, "queue")):
+            button.custom_id = f"rps:{match_id}:{round_num}:{move}"
+
     @ui.button(emoji="🪨", style=discord.ButtonStyle.secondary)
     async def rock(self, interaction: discord.Interaction, button: ui.Button):
         await self.handle_choice(interaction, "rock")
-    
+
     @ui.button(emoji="📄", style=discord.ButtonStyle.secondary)
     async def paper(self, interaction: discord.Interaction, button: ui.Button):
         await self.handle_choice(interaction, "paper")
-    
+
     @ui.button(emoji="✂️", style=discord.ButtonStyle.secondary)
     async def scissors(self, interaction: discord.Interaction, button: ui.Button):
         await self.handle_choice(interaction, "scissors")
-    
+
+    @ui.button(emoji="📝", label="Queue moves", style=discord.ButtonStyle.primary)
+    async def queue(self, interaction: discord.Interaction, button: ui.Button):
+        if interaction.user.id != self.player.id:
+            return await interaction.response.send_message("This isn't your game!", ephemeral=True)
+        match = active_matches.get(self.match_id)
+        if match is None:
+            return await interaction.response.send_message("This match is over.", ephemeral=True)
+        await interaction.response.send_modal(QueueMovesModal(match, self))
+
     async def handle_choice(self, interaction: discord.Interaction, choice: str):
         if interaction.user.id != self.player.id:
             return await interaction.response.send_message("This isn't your game!", ephemeral=True)
+        if self.choice is not None:  # A second click that raced the first
+            return await interaction.response.defer()
         self.choice = choice
-        await interaction.response.send_message(f"You chose {choice}!", ephemeral=True)
         self.stop()
+        # Acknowledge by editing the prompt itself: one call, and the buttons can't be clicked again
+        await interaction.response.edit_message(content=chosen_text(interaction.message, choice), view=self.lock(choice))
+        log_ack(interaction)
+
+    def lock(self, choice: str) -> "RPSView":
+        """Disable every button, highlighting the chosen move"""
+        for button in self.children:
+            button.disabled = True
+            if button.custom_id.endswith(f":{choice}"):
+                button.style = discord.ButtonStyle.success
+        return self
+
+class QueueMovesModal(ui.Modal, title="Queue your next moves"):
+    moves = ui.TextInput(label="Moves in order: r p s, rock paper, or 🪨📄✂️", max_length=100)
+
+    def __init__(self, match: dict, view: RPSView):
+        super().__init__(timeout=match["move_timeout"] + 30)
+        self.match = match
+        self.view = view
+
+    async def on_submit(self, interaction: discord.Interaction):
+        moves = parse_moves(self.moves.value)
+        if not moves:
+            return await interaction.response.send_message(
+                "❌ Couldn't read those moves. Use r/p/s, rock/paper/scissors or 🪨📄✂️.", ephemeral=True
+            )
+        moves = moves[:MAX_QUEUED + 1]
+        first = None
+        if self.view.choice is None and not self.view.is_finished():
+            # The first move answers the round that's waiting, like clicking its button
+            first = moves.pop(0)
+            self.view.choice = first
+            self.view.stop()
+        queue = self.match["queued_moves"][self.match["players"].index(interaction.user.id)]
+        queue.clear()
+        queue.extend(moves[:MAX_QUEUED])
+        queued_text = f"📝 Queued for the next rounds: {', '.join(queue) or 'nothing'}"
+        if first is None:
+            return await interaction.response.send_message(queued_text, ephemeral=True)
+        await interaction.response.edit_message(
+            content=f"{chosen_text(interaction.message, first)}\n{queued_text}", view=self.view.lock(first)
+        )
+        log_ack(interaction)
+
+def duration_text(seconds: int) -> str:
+    """seconds in the largest unit that fits exactly ("10 seconds", "5 minutes", "36 hours")"""
+    for unit, size in (("day", 24 * 60 * 60), ("hour", 60 * 60), ("minute", 60), ("second", 1)):
+        if seconds % size == 0:
+            count = seconds // size
+            return f"{count} {unit}{'s' if count != 1 else ''}"
+
+def chosen_text(prompt: discord.Message, choice: str) -> str:
+    return f"{prompt.content}\n✅ You chose {choice}."
+
+def log_ack(interaction: discord.Interaction):
+    """Note acknowledgements that came close to Discord's 3 second deadline"""
+    age = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    if age > ACK_WARN:
+        logging.warning("Slow move acknowledgement: %.2fs after the click", age, extra={"event": "slow_ack", "age": age})
+
+def tree_fingerprint(guild: Optional[discord.Object] = None) -> str:
+    """Hash of every command's name, description and parameters as they're sent to Discord"""
+    payload = [cmd.to_dict(bot.tree) for cmd in bot.tree.get_commands(guild=guild)]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+async def sync_commands():
+    """Sync the command tree, skipping the (slow, rate-limited) call when nothing changed"""
+    guild = discord.Object(id=int(DEV_GUILD_ID)) if DEV_GUILD_ID else None
+    if guild:
+        bot.tree.copy_global_to(guild=guild)
+    scope = f"guild:{guild.id}" if guild else "global"
+    try:
+        with open(COMMAND_HASH_FILE, encoding="utf-8") as f:
+            hashes = json.load(f)
+    except (OSError, ValueError):
+        hashes = {}
+
+    fingerprint = tree_fingerprint(guild)
+    if hashes.get(scope) == fingerprint and not FORCE_SYNC:
+        logging.info("✅ Commands unchanged since last sync, skipping.")
+        return
+    try:
+        synced = await bot.tree.sync(guild=guild)
+        logging.info("✅ Synced %d command(s).", len(synced))
+    except Exception as e:
+        logging.error("❌ Error syncing commands: %s", e)
+        return
+    hashes[scope] = fingerprint
+    try:
+        with open(COMMAND_HASH_FILE, "w", encoding="utf-8") as f:
+            json.dump(hashes, f)
+    except OSError as e:
+        logging.warning("Couldn't save command fingerprint: %s", e)
+
+async def setup_hook():
+    # Runs once before connecting, unlike on_ready which fires again on every reconnect
+    await asyncio.to_thread(guild_configs.load)
+    await sync_commands()
+    reap_matches.start()
+
+@tasks.loop(seconds=REAPER_INTERVAL)
+async def reap_matches():
+    """Clean up matches that outlived their deadline and drop references nothing can use any more"""
+    now = datetime.now()
+    for match in list(active_matches.values()):
+        if match["interaction"] and (now - match["start_time"]).total_seconds() > INTERACTION_LIFETIME:
+            # The token has expired, so the interaction only pins memory; messages go to the channel instead
+            match["interaction"] = None
+        if (now - match["deadline"]).total_seconds() > REAPER_GRACE:
+            logging.warning("Reaping stuck match %s (%s old)", match["id"], now - match["start_time"])
+            await cancel_match(match)
+    # Records left behind by a process that died without checkpointing
+    for record in await store.list_matches():
+        if not record.get("suspended") and record.get("deadline", 0) + REAPER_GRACE < now.timestamp():
+            if record["id"] not in active_matches:
+                logging.warning("Reaping orphaned match record %s", record["id"])
+                await store.delete_match(record["id"])
+    for key, pool in list(matchmaking_pools.items()):
+        if not len(pool):
+            del matchmaking_pools[key]
+
+@reap_matches.error
+async def reap_matches_error(error: BaseException):
+    logging.error("Match reaper failed", exc_info=error)
+
+@tasks.loop(seconds=LEASE_RENEW)
+async def keep_leases():
+    """Renew this process's leases, then pick up checkpointed matches and brackets nobody owns"""
+    for name in list(held_leases):
+        if await store.take_lease(name, process_id, LEASE_TTL):
+            continue
+        # We stalled past LEASE_TTL and another process took over
+        held_leases.discard(name)
+        kind, _, owned_id = name.partition(":")
+        logging.error("Lost the lease on %s %s to another process", kind, owned_id)
+        if kind == "bracket" and owned_id in running_brackets:
+            running_brackets[owned_id].cancel()
+    await resume_matches()
+    await resume_brackets()
 
-def determine_winner(move1, move2):
-    if move1 == move2:
-        return 0
-    if (move1 == "rock" and move2 == "scissors") or \
-       (move1 == "scissors" and move2 == "paper") or \
-       (move1 == "paper" and move2 == "rock"):
-        return 1
-    return 2
+@keep_leases.error
+async def keep_leases_error(error: BaseException):
+    logging.error("Lease renewal failed", exc_info=error)
+
+bot.setup_hook = setup_hook
 
 @bot.event
 async def on_ready():
-    logging.info(f"✅ Logged in as {bot.user}")
-    try:
-        synced = await bot.tree.sync()
-        logging.info(f"✅ Synced {len(synced)} command(s).")
-    except Exception as e:
-        logging.error(f"❌ Error syncing commands: {e}")
+    logging.info("✅ Logged in as %s", bot.user)
+    # Its first pass resumes checkpointed matches and brackets; on_ready also fires on every reconnect
+    if not keep_leases.is_running():
+        keep_leases.start()
+
+@bot.event
+async def on_interaction(interaction: discord.Interaction):
+    """Record move clicks for matches that another shard process is running"""
+    if interaction.type is not discord.InteractionType.component:
+        return
+    custom_id = (interaction.data or {}).get("custom_id", "")
+    if not custom_id.startswith("rps:"):
+        return
+    _, match_id, round_num, move = custom_id.split(":")
+    if match_id in active_matches:
+        return  # Our own RPSView handles it
+    if move == "queue":
+        # The modal would have to come back to the process running the match
+        return await interaction.response.send_message("📝 Queuing moves isn't available right now - pick a move instead.", ephemeral=True)
+    record = await store.get_match(match_id)
+    if not record or record["round"] != int(round_num):
+        return await interaction.response.send_message("This round is no longer active.", ephemeral=True)
+    if interaction.user.id not in record["players"]:
+        return await interaction.response.send_message("This isn't your game!", ephemeral=True)
+    if await store.record_move(match_id, int(round_num), interaction.user.id, move):
+        view = RPSView(interaction.user, match_id, int(round_num))
+        view.stop()  # Only shown, never listened to
+        await interaction.response.edit_message(content=chosen_text(interaction.message, move), view=view.lock(move))
+        log_ack(interaction)
+    else:
+        await interaction.response.send_message("You already chose a move this round.", ephemeral=True)
 
 @bot.tree.command(name="season_rps", description="Start a Rock Paper Scissors game between two users.")
 @app_commands.describe(
@@ -395,7 +1111,9 @@ async def on_ready():
     player2="Home Team player",
     wins="Number of wins required to win the match",
     desc="Short description (e.g. 'Week 1 Game 1')",
-    channel="Channel to keep the scores in"
+    channel="Channel to keep the scores in",
+    queue="If a player is already in a match, start this one when they're free",
+    thread="Keep this match's scoreboard in its own thread under the score channel"
 )
 async def rps(
     interaction: discord.Interaction,
@@ -403,16 +1121,19 @@ async def rps(
     player2: discord.User,
     wins: int,
     desc: str = "",
-    channel: Optional[discord.TextChannel] = None
+    channel: Optional[discord.TextChannel] = None,
+    queue: bool = False,
+    thread: bool = False
 ):
     # Validation
     if player1.bot or player2.bot:
         return await interaction.response.send_message(
             "You can't include bots as players!", ephemeral=True
         )
-    if wins < 1 or wins > 10:
+    config = guild_configs.get(interaction.guild_id)
+    if wins < config.min_wins or wins > config.max_wins:
         return await interaction.response.send_message(
-            "Please choose a number of wins between 1 and 10", ephemeral=True
+            f"Please choose a number of wins between {config.min_wins} and {config.max_wins}", ephemeral=True
         )
     # Require channel argument
     if not channel or not isinstance(channel, discord.TextChannel):
@@ -421,253 +1142,12 @@ async def rps(
             ephemeral=True
         )
     # Admin check for score-keeping channels
-    # More reliable admin check
-    member = getattr(interaction.user, 'guild_permissions', None)
-    if not (member and member.administrator):
+    if not is_guild_admin(interaction):
         return await interaction.response.send_message(
             f"❌ Only admins can start games in {channel.mention}!",
             ephemeral=True
         )
-    # Track the active match at start
-    active_matches[channel.id] = {
-        "interaction": interaction,
-        "players": [player1.id, player2.id],
-        "start_time": datetime.now(),
-        "message": None  # Will store the scoreboard message
-    }
-
-    # Announce match
-    await interaction.response.send_message(
-        f"🎮 **RPS Match Started!**\n"
-        f"Away: {player1.mention}  vs  Home: {player2.mention}\n"
-        f"First to {wins} wins, first to 7 total ties ends in a draw.\n"
-        f"{f'**Match:** {desc}' if desc else ''}\n"
-        f"⏳ You have 36 hours to play!\n"
-        f"Scores will be kept in {channel.mention}"
-    )
-
-    # Initialize tracking
-    score = {player1.id: 0, player2.id: 0, "ties": 0}
-    move_history = {player1.id: [], player2.id: []}  # Stores all moves (e.g., ["✊", "✋", "✌️"])
-    last_move = {player1.id: "❔", player2.id: "❔"}
-    round_num = 1
-    scoreboard_message: Optional[discord.Message] = None
-
-    result_text = ""
-    def make_summary(final=False) -> str:
-        header = f"**{desc}**\n" if desc else ""
-        moves_text = (
-            f"**Moves:**\n"
-            f"{player1.mention}: {', '.join(move_history[player1.id])}\n"
-            f"{player2.mention}: {', '.join(move_history[player2.id])}\n\n"
-        )
-        score_text = (
-            f"**Score:** {player1.mention}: {score[player1.id]} | "
-            f"{player2.mention}: {score[player2.id]} | "
-            f"Ties: {score['ties']}\n\n"
-        )
-        # Calculate elapsed time
-        elapsed = (datetime.now() - active_matches[channel.id]["start_time"]).total_seconds() if channel.id in active_matches else 0
-        duration_text = f"⏱️ Match duration: {int(elapsed)} seconds\n\n"
-        base = f"{header}{moves_text}{score_text}{duration_text}{result_text}"
-        if final:
-            if score["ties"] >= 7:  # If ties reached 7, it's an automatic draw
-                base += "\n\n🤝 **Match ends in a draw due to too many ties!**"
-            elif score[player1.id] > score[player2.id]:
-                base += f"\n\n🎉 **{player1.mention} wins the match!**"
-            elif score[player2.id] > score[player1.id]:
-                base += f"\n\n🎉 **{player2.mention} wins the match!**"
-            else:
-                base += "\n\n🤝 **Match ends in a draw!**"
-        return base
-
-    # Main game loop
-
-    # MATCH TIMER LOGIC
-    MATCH_TIMEOUT = 30  # seconds (entire match must finish in 30 seconds)
-    match_task = asyncio.create_task(asyncio.sleep(MATCH_TIMEOUT))
-    match_ended = False
-
-    async def play_match():
-        nonlocal round_num, scoreboard_message, match_ended
-        while True:
-            # Prevent starting a new round if match ended (timed out)
-            if match_ended:
-                break
-            # Check win conditions
-            if score[player1.id] >= wins or score[player2.id] >= wins or score["ties"] >= 7:
-                break
-
-            # Get player moves
-            moves = {}
-            view1 = RPSView(player1)
-            view2 = RPSView(player2)
-
-            # Send move requests
-            try:
-                dm1 = await player1.create_dm()
-                dm_msg1 = await dm1.send(f"**Round {round_num}:** Select your move:", view=view1)
-
-                dm2 = await player2.create_dm()
-                dm_msg2 = await dm2.send(f"**Round {round_num}:** Select your move:", view=view2)
-            except discord.Forbidden:
-                await interaction.followup.send(
-                    f"⚠️ Couldn't DM players. Please enable DMs from server members.",
-                    ephemeral=True
-                )
-                match_ended = True
-                return
-
-            # Wait for moves, but break if match timer is done
-            move_tasks = [asyncio.create_task(view1.wait()), asyncio.create_task(view2.wait())]
-            done, pending = await asyncio.wait(move_tasks, timeout=1)
-            # If match timer expired, break out of loop
-            if match_ended:
-                break
-            # If both moves are done, continue; else, keep waiting until match timer expires
-            while not all(t.done() for t in move_tasks):
-                await asyncio.sleep(0.5)
-                if match_ended:
-                    break
-            # If match ended during waiting, break before recording moves or updating scoreboard
-            if match_ended:
-                break
-            # Record moves
-            moves[player1.id] = view1.choice
-            moves[player2.id] = view2.choice
-
-            # Update last move display
-            for pid, move in moves.items():
-                emoji = next(
-                    (emoji for emoji, name in EMOJI_TO_MOVE.items() if name == move),
-                    "❌" if move is None else "❔"
-                )
-                move_history[pid].append(emoji)  # Add to history
-                last_move[pid] = emoji  # Still track latest move for round results
-
-            # Determine round result
-            m1, m2 = moves[player1.id], moves[player2.id]
-            if m1 is None and m2 is None:
-                score["ties"] += 1
-                result_text = "Both players failed to play - round counted as tie."
-            elif m1 is None:
-                score[player2.id] += 1
-                result_text = f"{player2.mention} wins the round {player1.mention} failed to play."
-            elif m2 is None:
-                score[player1.id] += 1
-                result_text = f"{player1.mention} wins the round {player2.mention} failed to play."
-            else:
-                winner = determine_winner(m1, m2)
-                if winner == 1:
-                    score[player1.id] += 1
-                    result_text = f"{player1.mention} wins the round!"
-                elif winner == 2:
-                    score[player2.id] += 1
-                    result_text = f"{player2.mention} wins the round!"
-                else:
-                    score["ties"] += 1
-                    result_text = "Round is a tie."
-
-            # Update scoreboard
-            summary = make_summary()
-            try:
-                if scoreboard_message is None:
-                    scoreboard_message = await send_to_channel(interaction, summary)
-                else:
-                    await scoreboard_message.edit(content=summary)
-            except (discord.NotFound, discord.HTTPException):
-                scoreboard_message = await send_to_channel(interaction, summary)
-
-            # Send updates to players
-            for p in (player1, player2):
-                try:
-                    dm = await p.create_dm()
-                    await dm.send(
-                        f"**Round {round_num} Update**\n"
-                        f"{summary}\n\n"
-                        f"Next round starting soon..."
-                    )
-                except discord.Forbidden:
-                    continue
-
-            round_num += 1
-
-    # Run match and timer concurrently
-    play_task = asyncio.create_task(play_match())
-    done, pending = await asyncio.wait([play_task, match_task], return_when=asyncio.FIRST_COMPLETED)
-
-    # If match timer expired before match ended
-    if match_task in done and not play_task.done():
-        match_ended = True
-        # End match and declare winner
-        # If one player has more points, they win; if tied, it's a draw
-        final_summary = make_summary(final=True)
-        if score[player1.id] > score[player2.id]:
-            final_summary += f"\n\n⏰ **Match timer expired! {player1.mention} wins by score!**"
-        elif score[player2.id] > score[player1.id]:
-            final_summary += f"\n\n⏰ **Match timer expired! {player2.mention} wins by score!**"
-        else:
-            final_summary += "\n\n⏰ **Match timer expired! It's a draw!**"
-
-        # Add total match duration to the end message
-        elapsed = (datetime.now() - active_matches[interaction.channel.id]["start_time"]).total_seconds() if interaction.channel and interaction.channel.id in active_matches else 0
-        final_summary += f"\n\n⏱️ Match lasted {int(elapsed)} seconds"
-
-        # Always send a new message to the channel to announce match end
-        try:
-            await send_to_channel(interaction, f"**⏰ Match Ended Due to Timer!**\n{final_summary}")
-        except Exception as e:
-            logging.error(f"Failed to send end message to channel: {e}")
-
-        # Also DM both players
-        for p in (player1, player2):
-            try:
-                dm = await p.create_dm()
-                await dm.send(f"**Match Complete!**\n{final_summary}")
-            except discord.Forbidden:
-                continue
-        if interaction.channel and interaction.channel.id in active_matches:
-            del active_matches[interaction.channel.id]
-        return
-
-    # If match finished normally
-    final_summary = make_summary(final=True)
-    try:
-        if scoreboard_message is not None:
-            await scoreboard_message.edit(content=final_summary)
-        else:
-            scoreboard_message = await send_to_channel(interaction, final_summary)
-    except (discord.NotFound, discord.HTTPException):
-        scoreboard_message = await send_to_channel(interaction, final_summary)
-    for p in (player1, player2):
-        try:
-            dm = await p.create_dm()
-            await dm.send(f"**Match Complete!**\n{final_summary}")
-        except discord.Forbidden:
-            continue
-    if interaction.channel and interaction.channel.id in active_matches:
-        del active_matches[interaction.channel.id]
-
-    # Final update with error handling
-    final_summary = make_summary(final=True)
-    try:
-        if scoreboard_message is not None:
-            await scoreboard_message.edit(content=final_summary)
-        else:
-            scoreboard_message = await send_to_channel(interaction, final_summary)
-    except (discord.NotFound, discord.HTTPException):
-        scoreboard_message = await send_to_channel(interaction, final_summary)
-    
-    # Notify players of final result
-    for p in (player1, player2):
-        try:
-            dm = await p.create_dm()
-            await dm.send(f"**Match Complete!**\n{final_summary}")
-        except discord.Forbidden:
-            continue
-
-        if interaction.channel and interaction.channel.id in active_matches:
-            del active_matches[interaction.channel.id]
+    await start_match(interaction, player1, player2, wins, desc, channel, queue, thread=thread)
 
 @bot.tree.command(name="update", description="Pull latest from GitHub and redeploy on Render")
 @app_commands.check(is_guild_admin)
@@ -679,24 +1159,459 @@ async def update(interaction: discord.Interaction):
             ephemeral=True
         )
 
+    # aiohttp is already loaded by discord.py, so this costs no extra import and doesn't block the loop
     try:
-        resp = requests.post(hook_url, timeout=10)
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+            async with session.post(hook_url) as resp:
+                status = resp.status
     except Exception as e:
         return await interaction.response.send_message(
             f"❌ Error: {e}",
             ephemeral=True
         )
 
-    if 200 <= resp.status_code < 300:
+    if 200 <= status < 300:
         await interaction.response.send_message(
             "✅ Redeploy triggered on Render!",
             ephemeral=True
         )
     else:
         await interaction.response.send_message(
-            f"❌ Failed (HTTP {resp.status_code})",
+            f"❌ Failed (HTTP {status})",
+            ephemeral=True
+        )
+
+@bot.tree.command(name="rps_queue", description="Join matchmaking and get paired with a similarly rated opponent")
+@app_commands.describe(
+    wins="Number of wins required to win the match",
+    channel="Channel to keep the scores in"
+)
+async def rps_queue(
+    interaction: discord.Interaction,
+    wins: int = 3,
+    channel: Optional[discord.TextChannel] = None
+):
+    # Validation
+    config = guild_configs.get(interaction.guild_id)
+    if wins < config.min_wins or wins > config.max_wins:
+        return await interaction.response.send_message(
+            f"Please choose a number of wins between {config.min_wins} and {config.max_wins}", ephemeral=True
+        )
+    if not channel or not isinstance(channel, discord.TextChannel):
+        return await interaction.response.send_message(
+            "❌ You must specify a valid text channel to keep scores in!",
+            ephemeral=True
+        )
+    if channel.id in config.restricted_channels:
+        return await interaction.response.send_message(
+            f"❌ You cannot start games in {channel.mention} with this command!",
+            ephemeral=True
+        )
+    player = interaction.user
+    if await store.player_match(player.id):
+        return await interaction.response.send_message(
+            "❌ You're already in a match!", ephemeral=True
+        )
+    if any(player.id in pool for pool in matchmaking_pools.values()):
+        return await interaction.response.send_message(
+            "❌ You're already in the queue! Use /rps_queue_leave first.", ephemeral=True
+        )
+
+    rating = (await store.get_ratings([player.id])).get(player.id, DEFAULT_RATING)
+    pool = matchmaking_pools.setdefault((channel.id, wins), MatchmakingPool())
+    paired = pool.add(player.id, rating, player)
+    if paired is None:
+        return await interaction.response.send_message(
+            f"🔎 You joined the queue for first to {wins} in {channel.mention} (rating {rating}). "
+            f"You'll be paired with the next player near your rating.",
             ephemeral=True
         )
+    # Whoever waited plays away, the player who just joined plays home
+    opponent_id, opponent = paired
+    await start_match(interaction, opponent, player, wins, "Matchmaking", channel)
+
+@bot.tree.command(name="rps_queue_leave", description="Leave the matchmaking queue")
+async def rps_queue_leave(interaction: discord.Interaction):
+    if leave_matchmaking(interaction.user.id):
+        await interaction.response.send_message("👋 You left the matchmaking queue.", ephemeral=True)
+    else:
+        await interaction.response.send_message("❌ You're not in the matchmaking queue.", ephemeral=True)
+
+@bot.tree.command(name="rps_bracket", description="[Admin] Run a tournament bracket that plays itself out")
+@app_commands.describe(
+    name="Tournament name (e.g. 'Season 1 Playoffs')",
+    players="Players in seed order, best seed first (mention each one)",
+    wins="Number of wins required to win each match",
+    channel="Channel to keep the scores in",
+    format="Bracket format",
+    threads="Give each match its own thread under the score channel"
+)
+@app_commands.choices(format=[
+    app_commands.Choice(name="Single elimination", value="single"),
+    app_commands.Choice(name="Double elimination", value="double"),
+    app_commands.Choice(name="Swiss", value="swiss")
+])
+@app_commands.check(is_guild_admin)
+async def rps_bracket(
+    interaction: discord.Interaction,
+    name: str,
+    players: str,
+    wins: int,
+    channel: Optional[discord.TextChannel] = None,
+    format: str = "single",
+    threads: bool = False
+):
+    # Validation
+    config = guild_configs.get(interaction.guild_id)
+    if wins < config.min_wins or wins > config.max_wins:
+        return await interaction.response.send_message(
+            f"Please choose a number of wins between {config.min_wins} and {config.max_wins}", ephemeral=True
+        )
+    if not channel or not isinstance(channel, discord.TextChannel):
+        return await interaction.response.send_message(
+            "❌ You must specify a valid text channel to keep scores in!",
+            ephemeral=True
+        )
+    seeds = list(dict.fromkeys(int(pid) for pid in re.findall(r"<@!?(\d+)>", players)))
+    if len(seeds) < 2:
+        return await interaction.response.send_message(
+            "❌ Mention at least 2 players for the bracket!", ephemeral=True
+        )
+
+    bracket = Bracket(
+        uuid.uuid4().hex[:8], format, seeds,
+        name=name, guild_id=channel.guild.id, channel_id=channel.id, wins=wins, threads=threads
+    )
+    await store.save_bracket(bracket.to_dict())
+    await take_lease(f"bracket:{bracket.id}")  # A fresh id, so nobody else holds it
+    await interaction.response.send_message(
+        f"🏆 **{name}** bracket created! (`{bracket.id}`)\n"
+        f"{len(seeds)} players, {format} {'rounds' if format == 'swiss' else 'elimination'}, first to {wins} wins.\n"
+        f"Matches start now and scores will be kept in {channel.mention}"
+    )
+    running_brackets[bracket.id] = asyncio.create_task(run_bracket(bracket))
+
+async def run_bracket(bracket: Bracket):
+    """Play every ready bracket match concurrently, feeding results back until there's a champion"""
+    channel = bot.get_channel(bracket.info["channel_id"])
+    if not isinstance(channel, discord.TextChannel):
+        logging.error("Bracket %s: score channel %s is gone", bracket.id, bracket.info["channel_id"])
+        return
+    running = {}  # Format: {asyncio.Task: bracket_match_id}
+    try:
+        while not bracket.finished:
+            for m in bracket.ready_matches():
+                if m["id"] not in running.values():
+                    running[asyncio.create_task(play_bracket_match(bracket, m, channel))] = m["id"]
+            if not running:
+                break
+            done, pending = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                match_id = running.pop(task)
+                try:
+                    if task.result() == MATCH_CANCELLED:
+                        bracket.cancel(match_id)
+                        await channel.send(
+                            f"🛑 **{bracket.info['name']}**: match `{match_id}` was cancelled by an admin and won't be replayed or scored."
+                        )
+                    elif task.result() == MATCH_NOT_PLAYED:
+                        bracket.cancel(match_id)
+                        await channel.send(
+                            f"⚠️ **{bracket.info['name']}**: match `{match_id}` couldn't be played (the queue wait ran out "
+                            "or a player can't get DMs) and won't be scored."
+                        )
+                    else:
+                        bracket.report(match_id, task.result())
+                except Exception as e:
+                    # Left without a result, so the match is played again on the next pass
+                    logging.error("Bracket %s: match %s failed: %s", bracket.id, match_id, e)
+            # Saved after every result so a restart picks up where we left off
+            await store.save_bracket(bracket.to_dict())
+        if bracket.finished:
+            await channel.send(f"🏆 **{bracket.info['name']}** is over! <@{bracket.champion}> is the champion!")
+        elif any(m.get("cancelled") for m in bracket.matches.values()):
+            await channel.send(f"⏹️ **{bracket.info['name']}** can't go on without its cancelled or unplayed match(es), so it ends without a champion.")
+    except asyncio.CancelledError:
+        if shutting_down and not store.persistent:
+            await channel.send(
+                f"🛑 **{bracket.info['name']}** was stopped by a bot restart and can't continue - "
+                "nothing is saved between restarts here."
+            )
+        raise
+    finally:
+        running_brackets.pop(bracket.id, None)
+        if not shutting_down:  # shutdown lets go of it once the bracket's matches are checkpointed
+            await drop_lease(f"bracket:{bracket.id}")
+
+async def play_bracket_match(bracket: Bracket, m: dict, channel: discord.TextChannel) -> Optional[int]:
+    """Play one bracket match through the normal match flow, replaying elimination draws (but not cancelled or unplayed matches)"""
+    users = [await get_player(pid) for pid in m["players"]]
+    desc = f"{bracket.info['name']} - {m['id']}"
+    for attempt in range(MAX_REPLAYS + 1):
+        if shutting_down:
+            return None
+        # Fixed ids let a restarted bracket find the match it checkpointed
+        match_id = f"{bracket.id}-{m['id']}-{attempt}"
+        record = await store.get_match(match_id)
+        if record and record.get("suspended"):
+            winner = await resume_match(record)
+        else:
+            winner = await start_match(
+                None, users[0], users[1], bracket.info["wins"],
+                desc if not attempt else f"{desc} (replay {attempt})", channel,
+                queue=True, match_id=match_id, bracket_id=bracket.id, thread=bracket.info.get("threads", False)
+            )
+        if shutting_down:
+            return None
+        if winner is not None or bracket.format == "swiss":
+            return winner  # Including MATCH_CANCELLED and MATCH_NOT_PLAYED, which run_bracket takes out of play
+    # Still drawn after the replays: the higher seed advances
+    return min(m["players"], key=bracket.players.index)
+
+async def resume_brackets():
+    """Restart brackets with matches left to play for guilds this process serves and no other process drives"""
+    if shutting_down:
+        return
+    for data in await store.list_brackets():
+        bracket = Bracket.from_dict(data)
+        if not bracket.ready_matches() or bracket.id in running_brackets or not bot.get_guild(bracket.info["guild_id"]):
+            continue
+        if f"bracket:{bracket.id}" in held_leases or not await take_lease(f"bracket:{bracket.id}"):
+            continue
+        # Whoever held it before may have played on since the listing
+        bracket = Bracket.from_dict(await store.get_bracket(bracket.id))
+        if bracket.id in running_brackets:
+            continue
+        if not bracket.ready_matches():
+            await drop_lease(f"bracket:{bracket.id}")
+            continue
+        logging.info("Resuming bracket %s (%s)", bracket.id, bracket.info["name"])
+        running_brackets[bracket.id] = asyncio.create_task(run_bracket(bracket))
+
+@bot.tree.command(name="rps_bracket_status", description="Show the progress of a tournament bracket")
+@app_commands.describe(bracket_id="Bracket id shown when it was created")
+async def rps_bracket_status(interaction: discord.Interaction, bracket_id: str):
+    data = await store.get_bracket(bracket_id)
+    if not data:
+        return await interaction.response.send_message(
+            f"❌ No bracket found with id `{bracket_id}`", ephemeral=True
+        )
+    bracket = Bracket.from_dict(data)
+    done = sum(1 for m in bracket.matches.values() if m["winner"] is not None)
+    cancelled = [m["id"] for m in bracket.matches.values() if m.get("cancelled")]
+    embed = discord.Embed(
+        title=f"🏆 {bracket.info['name']}",
+        description=(
+            f"**Format:** {bracket.format}\n"
+            f"**Matches decided:** {done}/{len(bracket.matches)}\n"
+            + (f"**Cancelled or not played:** {', '.join(cancelled)}\n" if cancelled else "") +
+            f"**Playing now:** {', '.join(m['id'] for m in bracket.ready_matches()) or 'none'}"
+        ),
+        color=discord.Color.gold()
+    )
+    if bracket.format == "swiss":
+        embed.add_field(
+            name=f"Standings after round {bracket.round}/{bracket.total_rounds}",
+            value="\n".join(f"{user_cache.name(pid)}: {pts:g} pts" for pid, pts, _ in bracket.standings()[:10]),
+            inline=False
+        )
+    if bracket.finished:
+        embed.add_field(name="Champion", value=f"<@{bracket.champion}>", inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+def post_to_feeds(match: dict, line: str):
+    """Add a result to every spectator feed in the match's server; each feed edits at most once per FEED_INTERVAL"""
+    for feed in spectator_feeds.values():
+        if feed["guild_id"] != match["guild_id"]:
+            continue
+        feed["lines"].append(line)
+        if feed["flush"] is None:
+            feed["flush"] = asyncio.create_task(flush_feed(feed))
+
+async def flush_feed(feed: dict):
+    """Publish everything a feed collected in one edit of its shared message"""
+    await asyncio.sleep(FEED_INTERVAL)
+    feed["flush"] = None  # Results arriving from here on schedule the next edit
+    embed = discord.Embed(title="📺 Live RPS", description="\n".join(feed["lines"]), color=discord.Color.blurple())
+    embed.set_footer(text=f"👀 {len(feed['watchers'])} watching • /rps_watch to join or leave")
+    try:
+        if feed["message"] is not None:
+            try:
+                await outbound.run(INFO, lambda: feed["message"].edit(embed=embed), droppable=True)
+                return
+            except discord.NotFound:
+                pass  # Deleted: post a new one
+        # None if dropped under load; the lines stay on the feed for the next flush
+        feed["message"] = await outbound.run(INFO, lambda: feed["channel"].send(embed=embed), droppable=True)
+    except discord.HTTPException as e:
+        logging.warning("Spectator feed in %s failed to update: %s", feed["channel"].id, e)
+
+@bot.tree.command(name="rps_watch", description="Follow this server's matches live in this channel (run again to stop)")
+async def rps_watch(interaction: discord.Interaction):
+    channel = interaction.channel
+    if interaction.guild is None or not isinstance(channel, (discord.TextChannel, discord.Thread)):
+        return await interaction.response.send_message("❌ Use this in a server text channel or thread!", ephemeral=True)
+    feed = spectator_feeds.get(channel.id)
+    if feed and interaction.user.id in feed["watchers"]:
+        feed["watchers"].discard(interaction.user.id)
+        if not feed["watchers"]:
+            # Nobody left: stop updating this channel
+            if feed["flush"] is not None:
+                feed["flush"].cancel()
+            del spectator_feeds[channel.id]
+        return await interaction.response.send_message("👋 Stopped watching.", ephemeral=True)
+    if feed is None:
+        # Everyone watching from this channel shares one feed and one message
+        feed = spectator_feeds[channel.id] = {
+            "guild_id": interaction.guild.id,
+            "channel": channel,
+            "watchers": set(),
+            "lines": deque(maxlen=FEED_LINES),
+            "message": None,
+            "flush": None  # Pending flush_feed task, if results are waiting to be published
+        }
+    feed["watchers"].add(interaction.user.id)
+    await interaction.response.send_message(
+        f"👀 Watching! Results from this server's matches will appear in one live message here "
+        f"({len(feed['watchers'])} watching).",
+        ephemeral=True
+    )
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """Approximate bytes held by plain containers; discord objects are counted shallowly
+    since following them would walk the whole client cache"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+@bot.tree.command(name="rps_config", description="[Admin] Show or change this server's RPS settings (applies right away)")
+@app_commands.describe(
+    tie_limit="Total ties that end a match in a draw",
+    min_wins="Smallest number of wins a match can be played to",
+    max_wins="Largest number of wins a match can be played to",
+    match_timeout="Seconds a match may run before it's decided by score",
+    move_timeout="Seconds a player has to answer each round before forfeiting it",
+    restrict="Channel where /rps_start can't be used",
+    unrestrict="Channel to allow /rps_start in again",
+    webhooks=f"Post scoreboards as '{WEBHOOK_NAME}' through a channel webhook (needs Manage Webhooks)",
+    images="Show every round's moves as a picture instead of the last few as emoji",
+    reload="Re-read the settings from the database (after another process changed them)"
+)
+@app_commands.check(is_guild_admin)
+async def rps_config(
+    interaction: discord.Interaction,
+    tie_limit: Optional[app_commands.Range[int, 1, 100]] = None,
+    min_wins: Optional[app_commands.Range[int, 1, 100]] = None,
+    max_wins: Optional[app_commands.Range[int, 1, 100]] = None,
+    match_timeout: Optional[app_commands.Range[int, MOVE_TIMEOUT, 7 * 24 * 60 * 60]] = None,
+    move_timeout: Optional[app_commands.Range[int, 5, 7 * 24 * 60 * 60]] = None,
+    restrict: Optional[discord.TextChannel] = None,
+    unrestrict: Optional[discord.TextChannel] = None,
+    webhooks: Optional[bool] = None,
+    images: Optional[bool] = None,
+    reload: bool = False
+):
+    if reload:
+        await asyncio.to_thread(guild_configs.load)
+    config = guild_configs.get(interaction.guild_id)
+    changes = {
+        name: value for name, value in
+        (("tie_limit", tie_limit), ("min_wins", min_wins), ("max_wins", max_wins), ("match_timeout", match_timeout), ("move_timeout", move_timeout))
+        if value is not None
+    }
+    if restrict or unrestrict:
+        channels = set(config.restricted_channels)
+        if restrict:
+            channels.add(restrict.id)
+        if unrestrict:
+            channels.discard(unrestrict.id)
+        changes["restricted_channels"] = frozenset(channels)
+    if webhooks is not None:
+        changes["webhook_scoreboards"] = webhooks
+        scoreboard_webhooks.clear()  # Retry channels where permissions were missing before
+    if images and importlib.util.find_spec("PIL") is None:
+        return await interaction.response.send_message(
+            "❌ Image scoreboards need Pillow: `pip install -r requirements-extras.txt`", ephemeral=True
+        )
+    if images is not None:
+        changes["image_scoreboards"] = images
+    if changes.get("min_wins", config.min_wins) > changes.get("max_wins", config.max_wins):
+        return await interaction.response.send_message("❌ min_wins can't be more than max_wins!", ephemeral=True)
+    if changes.get("move_timeout", config.move_timeout) > changes.get("match_timeout", config.match_timeout):
+        return await interaction.response.send_message("❌ move_timeout can't be longer than match_timeout!", ephemeral=True)
+    if changes:
+        config = await asyncio.to_thread(guild_configs.update, interaction.guild_id, **changes)
+
+    embed = discord.Embed(title="⚙️ RPS settings", color=discord.Color.blurple())
+    embed.add_field(name="Wins", value=f"{config.min_wins}-{config.max_wins}")
+    embed.add_field(name="Tie limit", value=str(config.tie_limit))
+    embed.add_field(name="Match timeout", value=duration_text(config.match_timeout))
+    embed.add_field(name="Move timeout", value=duration_text(config.move_timeout))
+    embed.add_field(
+        name="Scoreboards",
+        value=(f"via {WEBHOOK_NAME} webhook" if config.webhook_scoreboards else "posted by the bot")
+        + (", moves as a picture" if config.image_scoreboards else "")
+    )
+    embed.add_field(
+        name="Restricted channels",
+        value=" ".join(f"<#{cid}>" for cid in sorted(config.restricted_channels) if interaction.guild.get_channel(cid)) or "none",
+        inline=False
+    )
+    if changes:
+        embed.set_footer(text="Updated - new matches use these settings")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+def stop_tracing():
+    """Turn allocation tracing off; tracemalloc slows every allocation and holds a traceback for each live block"""
+    global last_snapshot, trace_stop
+    if trace_stop is not None:
+        trace_stop.cancel()
+        trace_stop = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logging.info("Stopped allocation tracing")
+    last_snapshot = None
+
+@bot.tree.command(name="rps_memory", description="[Admin] Memory use per match and allocation growth since the last check")
+@app_commands.describe(stop="Stop allocation tracing instead of reporting growth")
+@app_commands.check(is_guild_admin)
+async def rps_memory(interaction: discord.Interaction, stop: bool = False):
+    global last_snapshot, trace_stop
+    lines = [f"**Active matches:** {len(active_matches)} | **Queued:** {len(waiting_matches)} | "
+             f"**In matchmaking:** {sum(len(p) for p in matchmaking_pools.values())} | **Cached users:** {len(user_cache)} | "
+             f"**Spectator feeds:** {len(spectator_feeds)} | **Outbound:** {len(outbound)} waiting, {outbound.dropped} dropped"]
+    for match in sorted(active_matches.values(), key=lambda m: m["start_time"]):
+        age = str(datetime.now() - match["start_time"]).split('.')[0]
+        lines.append(f"`{match['id']}` <#{match['channel_id']}> round {match['round']}, {age} old: ~{deep_sizeof(match) / 1024:.1f} KiB")
+
+    if stop:
+        stop_tracing()
+        lines.append("\n🔬 Allocation tracing is off.")
+    elif not tracemalloc.is_tracing():
+        tracemalloc.start()
+        last_snapshot = tracemalloc.take_snapshot()
+        trace_stop = asyncio.get_running_loop().call_later(TRACE_LIMIT, stop_tracing)
+        lines.append(f"\n🔬 Started allocation tracing for {duration_text(TRACE_LIMIT)}; run this again later to see what grew, "
+                     "or with `stop:True` to end it sooner.")
+    else:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(f"\n**Traced:** {current / 1024 / 1024:.1f} MiB (peak {peak / 1024 / 1024:.1f} MiB)")
+        lines.append("**Top growth since last check:**")
+        for stat in snapshot.compare_to(last_snapshot, "lineno")[:8]:
+            frame = stat.traceback[0]
+            lines.append(f"`{os.path.basename(frame.filename)}:{frame.lineno}` {stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks)")
+        last_snapshot = snapshot
+
+    text = "\n".join(lines)
+    await interaction.response.send_message(text[:1990], ephemeral=True)
 
 @bot.tree.command(name="ping", description="Check if the bot is up and see its latency.")
 async def ping(interaction: discord.Interaction):
@@ -707,37 +1622,57 @@ async def ping(interaction: discord.Interaction):
 @bot.tree.command(name="rps_cancel", description="[Admin] Cancel an ongoing RPS match")
 @app_commands.describe(
     channel="Channel where match is happening (defaults to current)",
+    match_id="Id of the match to cancel, as shown by /rps_list (needed when a channel has several)",
     reason="Reason for cancellation"
 )
 @app_commands.default_permissions(manage_messages=True)
 async def rps_cancel(
     interaction: discord.Interaction,
     channel: Optional[discord.TextChannel] = None,
+    match_id: Optional[str] = None,
     reason: str = "No reason provided"
 ):
     """Allows admins to cancel stuck RPS matches"""
-    target_channel = channel or interaction.channel
-    
-    if not target_channel or not isinstance(target_channel, discord.TextChannel):
-        return await interaction.response.send_message(
-            "❌ This command only works in text channels!",
-            ephemeral=True
-        )
-
-    match_data = active_matches.get(target_channel.id)
-    
-    if not match_data:
-        return await interaction.response.send_message(
-            f"❌ No active RPS match found in {target_channel.mention}",
-            ephemeral=True
-        )
-    
-    # Get player objects for the cancellation message
+    if match_id:
+        match_data = active_matches.get(match_id.strip("` "))
+        if not match_data or match_data["guild_id"] != interaction.guild_id:
+            return await interaction.response.send_message(
+                f"❌ No active RPS match with id `{match_id}`",
+                ephemeral=True
+            )
+        target_channel = match_data["channel"]
+    else:
+        target_channel = channel or interaction.channel
+
+        if not target_channel or not isinstance(target_channel, (discord.TextChannel, discord.Thread)):
+            return await interaction.response.send_message(
+                "❌ This command only works in text channels!",
+                ephemeral=True
+            )
+
+        matches = find_matches(interaction.guild_id, target_channel)
+        if not matches:
+            return await interaction.response.send_message(
+                f"❌ No active RPS match found in {target_channel.mention}",
+                ephemeral=True
+            )
+        if len(matches) > 1:
+            # Brackets run many matches in one score channel; don't guess which one is meant
+            header = f"❌ {len(matches)} matches are running in {target_channel.mention} - pick one with `match_id`:"
+            return await interaction.response.send_message(
+                bulk_summary(header, [match_line(m) for m in matches]),
+                ephemeral=True
+            )
+        match_data = matches[0]
+
+    # Cancelling edits prompts and clears the store; under rate limits that can outlast the 3 second deadline
+    await interaction.response.defer(ephemeral=True, thinking=True)
+
+    # Player info for the cancellation message (cached when the match started)
     try:
-        player1 = await bot.fetch_user(match_data["players"][0])
-        player2 = await bot.fetch_user(match_data["players"][1])
+        player1, player2 = [await get_user_info(pid) for pid in match_data["players"]]
     except discord.NotFound:
-        return await interaction.response.send_message(
+        return await interaction.followup.send(
             "❌ Couldn't find one or both players!",
             ephemeral=True
         )
@@ -753,12 +1688,15 @@ async def rps_cancel(
         ),
         color=discord.Color.red()
     )
-    
+
     # Calculate and format duration
     duration = datetime.now() - match_data['start_time']
     duration_str = str(duration).split('.')[0]  # Removes microseconds
     embed.set_footer(text=f"Match duration: {duration_str}")
-    
+
+    # Stop the match first so nothing of it gets posted after the notice
+    await cancel_match(match_data)
+
     # Try to notify in the game channel
     try:
         await target_channel.send(embed=embed)
@@ -767,11 +1705,154 @@ async def rps_cancel(
             "⚠️ Couldn't send cancellation message to the game channel",
             ephemeral=True
         )
-    
-    # Clean up and confirm
-    del active_matches[target_channel.id]
+
+    # Confirm
+    await interaction.followup.send(
+        f"✅ Successfully cancelled match `{match_data['id']}` in {target_channel.mention}",
+        ephemeral=True
+    )
+
+def find_matches(
+    guild_id: int,
+    channel: Optional[discord.abc.GuildChannel] = None,
+    player: Optional[discord.User] = None,
+    older_than: Optional[int] = None
+) -> list:
+    """This server's running matches that pass every given filter, oldest first"""
+    now = datetime.now()
+    return sorted((
+        m for m in active_matches.values()
+        if m["guild_id"] == guild_id
+        and (channel is None or channel.id in (m["channel_id"], m["channel"].id))
+        and (player is None or player.id in m["players"])
+        and (older_than is None or now - m["start_time"] >= timedelta(minutes=older_than))
+    ), key=lambda m: m["start_time"])
+
+async def for_each_match(matches: list, action) -> list:
+    """Run action(match) for every match, BULK_CONCURRENCY at a time; returns results or exceptions"""
+    limit = asyncio.Semaphore(BULK_CONCURRENCY)
+    async def run(match: dict):
+        async with limit:
+            return await action(match)
+    return await asyncio.gather(*(run(m) for m in matches), return_exceptions=True)
+
+def match_line(match: dict) -> str:
+    p1, p2 = (f"<@{pid}>" for pid in match["players"])
+    age = str(datetime.now() - match["start_time"]).split('.')[0]
+    left = max(0, int((match["deadline"] - datetime.now()).total_seconds()))
+    return (
+        f"`{match['id']}` <#{match['channel'].id}> {p1} {match['score'][0]}-{match['score'][1]} {p2}, "
+        f"round {match['round']}, {age} old, {left}s left"
+    )
+
+def bulk_summary(header: str, lines: list) -> str:
+    """One message for a bulk command, trimmed to fit Discord's limit"""
+    text = header
+    for shown, line in enumerate(lines):
+        if len(text) + len(line) > 1900:
+            return f"{text}\n…and {len(lines) - shown} more"
+        text += f"\n{line}"
+    return text
+
+MATCH_FILTERS = dict(
+    channel="Only matches scored in this channel (or its threads)",
+    player="Only matches this player is in",
+    older_than="Only matches that started at least this many minutes ago"
+)
+
+@bot.tree.command(name="rps_list", description="[Admin] List running matches in this server")
+@app_commands.describe(**MATCH_FILTERS)
+@app_commands.default_permissions(manage_messages=True)
+async def rps_list(
+    interaction: discord.Interaction,
+    channel: Optional[discord.TextChannel] = None,
+    player: Optional[discord.User] = None,
+    older_than: Optional[app_commands.Range[int, 0]] = None
+):
+    matches = find_matches(interaction.guild_id, channel, player, older_than)
+    if not matches:
+        return await interaction.response.send_message("No matching RPS matches are running.", ephemeral=True)
     await interaction.response.send_message(
-        f"✅ Successfully cancelled match in {target_channel.mention}",
+        bulk_summary(f"🎮 **{len(matches)} match(es) running:**", [match_line(m) for m in matches]),
         ephemeral=True
     )
-bot.run(TOKEN)
\ No newline at end of file
+
+@bot.tree.command(name="rps_cancel_all", description="[Admin] Cancel every running match that matches the filters")
+@app_commands.describe(reason="Reason for cancellation", **MATCH_FILTERS)
+@app_commands.default_permissions(manage_messages=True)
+async def rps_cancel_all(
+    interaction: discord.Interaction,
+    channel: Optional[discord.TextChannel] = None,
+    player: Optional[discord.User] = None,
+    older_than: Optional[app_commands.Range[int, 0]] = None,
+    reason: str = "No reason provided"
+):
+    matches = find_matches(interaction.guild_id, channel, player, older_than)
+    if not matches:
+        return await interaction.response.send_message("No matching RPS matches are running.", ephemeral=True)
+    await interaction.response.defer(thinking=True)
+    lines = [match_line(m) for m in matches]  # Before cancelling clears them out
+    results = await for_each_match(matches, cancel_match)
+    failed = sum(isinstance(result, Exception) for result in results)
+    embed = discord.Embed(
+        title=f"⚠️ {len(matches) - failed} RPS match(es) cancelled",
+        description=bulk_summary(f"**Admin:** {interaction.user.mention}\n**Reason:** {reason}\n", lines)[:4000],
+        color=discord.Color.red()
+    )
+    if failed:
+        embed.set_footer(text=f"{failed} failed to cancel cleanly")
+    await interaction.followup.send(embed=embed)
+
+@bot.tree.command(name="rps_extend", description="[Admin] Give running matches more time")
+@app_commands.describe(minutes="Minutes to add to each match's timer", **MATCH_FILTERS)
+@app_commands.default_permissions(manage_messages=True)
+async def rps_extend(
+    interaction: discord.Interaction,
+    minutes: app_commands.Range[int, 1, 24 * 60],
+    channel: Optional[discord.TextChannel] = None,
+    player: Optional[discord.User] = None,
+    older_than: Optional[app_commands.Range[int, 0]] = None
+):
+    matches = find_matches(interaction.guild_id, channel, player, older_than)
+    if not matches:
+        return await interaction.response.send_message("No matching RPS matches are running.", ephemeral=True)
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    async def extend(match: dict):
+        match["deadline"] += timedelta(minutes=minutes)  # match_clock picks this up when it wakes
+        await store.save_match(match_record(match))
+    results = await for_each_match(matches, extend)
+    failed = sum(isinstance(result, Exception) for result in results)
+    header = f"⏳ Added {minutes} minute(s) to {len(matches)} match(es)" + (f" ({failed} not saved to the store)" if failed else "") + ":"
+    await interaction.followup.send(bulk_summary(header, [match_line(m) for m in matches]), ephemeral=True)
+
+async def serve_interactions():
+    """Run without a gateway connection, taking interactions over HTTP (INTERACTIONS_MODE=http)"""
+    # Imported here so gateway deployments don't need PyNaCl
+    from http_interactions import InteractionServer
+
+    await bot.login(TOKEN)  # Also runs setup_hook
+    logging.info("✅ Logged in as %s (HTTP interactions)", bot.user)
+    server = InteractionServer(bot, DISCORD_PUBLIC_KEY)
+    await server.warm()
+    # on_ready never fires without a gateway
+    keep_leases.start()
+    await server.serve(PORT)
+
+async def main():
+    setup_logging(os.getenv("LOG_FORMAT", "text"), os.getenv("LOG_LEVEL", "INFO"), float(os.getenv("LOG_ROUND_SAMPLE", "1")))
+    if INTERACTIONS_MODE != "http":
+        keep_alive()  # The interactions server answers health checks itself
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, request_shutdown)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C still stops the bot, just without draining matches
+    async with bot:
+        if INTERACTIONS_MODE == "http":
+            await serve_interactions()
+        else:
+            await bot.start(TOKEN)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,171 @@
+"""Per-round hot path benchmark: scoring and scoreboard rendering on a long match.
+
+Times the functions in game.py that run on every round (winner lookup, move
+emoji lookup, round resolution, scoreboard rendering), and the image
+scoreboard from scoreboard_image.py when Pillow is installed, and measures how
+many bytes each call allocates at its peak. Results are compared with the
+committed baseline, and the run fails if any case got more than --threshold
+times slower or hungrier, or if there is no baseline to compare with.
+
+Times are scaled by a fixed reference workload measured in the same run, so a
+faster or slower machine (or a busier one than when the baseline was saved)
+doesn't count as a regression. Allocation sizes hardly depend on the machine.
+Re-record and commit the baseline when a change is meant to move the numbers.
+
+    python benchmarks/hot_path.py --save        record the baseline (benchmarks/hot_path_baseline.json)
+    python benchmarks/hot_path.py               compare with it
+    python benchmarks/hot_path.py --threshold 2
+"""
+import os
+import sys
+import json
+import random
+import timeit
+import argparse
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from game import determine_winner, move_emoji, resolve_round, scoreboard  # noqa: E402
+try:
+    from scoreboard_image import MoveCanvas  # noqa: E402
+except ImportError:  # Pillow is optional (requirements-extras.txt)
+    MoveCanvas = None
+
+BASELINE = os.path.join(ROOT, "benchmarks", "hot_path_baseline.json")
+LONG_MATCH = 200  # rounds already played when the scoreboard is rendered
+MOVES = ("rock", "paper", "scissors")
+CONFIRM_RUNS = 2  # Extra measurements of a case that looks slower than the baseline, before it fails the run
+
+
+def make_match(rounds: int) -> dict:
+    """A match dict shaped like new_match() builds, with `rounds` random rounds already played"""
+    match = {
+        "players": [111111111111111111, 222222222222222222],
+        "desc": "Week 12 Game 3",
+        "wins": 10,
+        "tie_limit": 1000,  # Long matches need room for ties
+        "score": [0, 0],
+        "ties": 0,
+        "moves": [[], []],
+        "result_text": "",
+        "start_time": datetime.now()
+    }
+    rng = random.Random(rounds)
+    for _ in range(rounds):
+        resolve_round(match, rng.choice(MOVES + (None,)), rng.choice(MOVES + (None,)))
+    return match
+
+
+def cases() -> dict:
+    """{name: zero-arg callable doing one unit of work}"""
+    pairs = [(a, b) for a in MOVES for b in MOVES]
+    long_match = make_match(LONG_MATCH)
+    rng = random.Random(0)
+    rounds = [(rng.choice(MOVES), rng.choice(MOVES)) for _ in range(LONG_MATCH)]
+
+    def resolve_long_match():
+        # A fresh history each time, so every call does the same LONG_MATCH rounds
+        match = make_match(0)
+        for m1, m2 in rounds:
+            resolve_round(match, m1, m2)
+
+    found = {
+        "determine_winner (9 pairs)": lambda: [determine_winner(a, b) for a, b in pairs],
+        "move_emoji (4 moves)": lambda: [move_emoji(m) for m in MOVES + (None,)],
+        f"resolve_round x{LONG_MATCH}": resolve_long_match,
+        f"scoreboard ({LONG_MATCH} rounds)": lambda: scoreboard(long_match),
+        f"final scoreboard ({LONG_MATCH} rounds)": lambda: scoreboard(long_match, final=True)
+    }
+    if MoveCanvas is not None:
+        names = ["Player One", "Player Two"]
+        canvas = MoveCanvas(names)
+        canvas.render(long_match["moves"])
+
+        def image_round():
+            # Take back the last round so every call draws and compresses one new column
+            canvas.drawn -= 1
+            canvas.render(long_match["moves"])
+
+        found[f"image round {LONG_MATCH}"] = image_round
+        found[f"image from scratch ({LONG_MATCH} rounds)"] = lambda: MoveCanvas(names).render(long_match["moves"])
+    return found
+
+
+def reference():
+    """Fixed pure-Python work, timed alongside the cases to gauge how fast the machine is right now"""
+    total = 0
+    for i in range(2000):
+        total += len(str(i)) * (i % 7)
+    return total
+
+
+def measure(func, repeat: int) -> dict:
+    """Best-of-repeat time per call and peak bytes allocated by one call"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    ns = min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+    func()  # Warm up caches so they aren't counted as allocations
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ns": round(ns, 1), "bytes": peak - before}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=1.5, help="allowed slowdown/growth factor")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    # Before and after the cases, keeping the faster, so a burst of load during one doesn't skew the scale
+    reference_ns = measure(reference, args.repeat)["ns"]
+    results = {name: measure(func, args.repeat) for name, func in cases().items()}
+    reference_ns = min(reference_ns, measure(reference, args.repeat)["ns"])
+    baseline, scale = {}, 1.0
+    if os.path.exists(BASELINE) and not args.save:
+        with open(BASELINE, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = saved.get("cases", {})
+        scale = saved.get("reference_ns", reference_ns) / reference_ns
+
+    regressions = []
+    funcs = cases()
+    print(f"{'case':<32}{'time':>12}{'peak alloc':>14}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        for _ in range(CONFIRM_RUNS):
+            if not base or result["ns"] * scale / base["ns"] <= args.threshold:
+                break
+            # Looks slower: measure again before calling it a regression, keeping the best time seen
+            result["ns"] = min(result["ns"], measure(funcs[name], args.repeat)["ns"])
+        line = f"{name:<32}{result['ns'] / 1000:>9.2f} us{result['bytes']:>12} B"
+        if base:
+            time_ratio = result["ns"] * scale / base["ns"]
+            # A few bytes either way is noise; only growth past the threshold of a real allocation counts
+            alloc_ratio = result["bytes"] / max(base["bytes"], 256)
+            line += f"   x{time_ratio:.2f} time, x{alloc_ratio:.2f} alloc vs baseline"
+            if time_ratio > args.threshold or alloc_ratio > args.threshold:
+                regressions.append(name)
+                line += "  <-- REGRESSION"
+        print(line)
+
+    if args.save:
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump({"reference_ns": reference_ns, "cases": results}, f, indent=2)
+        print(f"\nBaseline saved to {os.path.relpath(BASELINE, ROOT)}")
+    elif not baseline:
+        print(f"\nNo baseline in {os.path.relpath(BASELINE, ROOT)}; run with --save to record one")
+        sys.exit(1)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed past x{args.threshold}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
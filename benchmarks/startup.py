@@ -0,0 +1,93 @@
+"""Cold-start benchmark: how long `import RPS` takes and how much memory it leaves.
+
+Each run imports the bot module in a fresh interpreter (nothing connects to
+Discord; the bot only starts under __main__) and reports wall time, peak RSS
+and the slowest imports from `python -X importtime`.
+
+    python benchmarks/startup.py [--runs 5] [--module RPS] [--top 10]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one JSON line with the measurements
+PROBE = """
+import sys, time, json, importlib
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB on Linux
+except ImportError:  # Windows
+    rss_mb = None
+print(json.dumps({"seconds": elapsed, "rss_mb": rss_mb}))
+"""
+
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    # The module refuses to load without a token; a placeholder is enough since nothing connects
+    env.setdefault("DISCORD_TOKEN", "benchmark")
+    return env
+
+
+def measure(module: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, module],
+        cwd=ROOT, env=child_env(), capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, top: int) -> list:
+    """[(cumulative_us, package)] for the module's own imports, slowest first"""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=child_env(), capture_output=True, text=True, check=True
+    )
+    rows, children = [], []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented two spaces per level and listed before the module that imported them.
+        # Keep the module's direct imports (depth 1) so each dependency shows up once, with its own subtree.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative), name.strip()))
+        elif depth == 0:
+            if name.strip() == module:
+                rows = children
+            children = []
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="RPS")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    results = [measure(args.module) for _ in range(args.runs)]
+    seconds = [r["seconds"] for r in results]
+    print(f"import {args.module}: {args.runs} cold runs")
+    print(f"  time  median {statistics.median(seconds) * 1000:.0f} ms, "
+          f"min {min(seconds) * 1000:.0f} ms, max {max(seconds) * 1000:.0f} ms")
+    rss = [r["rss_mb"] for r in results if r["rss_mb"] is not None]
+    print(f"  peak RSS  {statistics.median(rss):.1f} MB" if rss else "  peak RSS  n/a on this platform")
+
+    print("\nSlowest imports (cumulative):")
+    for micros, name in slowest_imports(args.module, args.top):
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Tournament brackets: single elimination, double elimination and Swiss.
+
+A `Bracket` only knows about player ids and results; RPS.py plays the
+matches it hands out and reports winners back. All state round-trips
+through `to_dict()`/`from_dict()` so it can live in the match store.
+"""
+import math
+from typing import Optional
+
+FORMATS = ("single", "double", "swiss")
+BYE = 0  # Slot value for a bye; None means the slot is still waiting on an earlier match
+
+
+def seed_order(size: int) -> list:
+    """Bracket positions of seeds 1..size so top seeds meet as late as possible"""
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [s for seed in order for s in (seed, total - seed)]
+    return order
+
+
+class Bracket:
+    def __init__(self, bracket_id: str, fmt: str, players: list, **info):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown bracket format: {fmt}")
+        if len(players) < 2:
+            raise ValueError("A bracket needs at least 2 players")
+        self.id = bracket_id
+        self.format = fmt
+        self.players = list(players)  # Seed order, best first
+        self.info = info  # Anything the caller wants kept with the bracket (channel, wins, name...)
+        self.matches = {}  # Format: {match_id: {"players": [a, b], "winner": ..., "win_to": [id, slot], ...}}
+        self.points = {}  # Swiss only: {player_id: points}
+        self.round = 0
+        self.champion = None
+        if fmt == "swiss":
+            self.points = {pid: 0.0 for pid in self.players}
+            self.total_rounds = math.ceil(math.log2(len(self.players)))
+            self._next_swiss_round()
+        else:
+            self.total_rounds = 0
+            self._build_elimination()
+            self._settle()
+
+    # ---- Building ----
+
+    def _add(self, match_id: str, rnd: int, players=None, win_to=None, lose_to=None):
+        self.matches[match_id] = {
+            "id": match_id,
+            "round": rnd,
+            "players": players or [None, None],
+            "winner": None,
+            "cancelled": False,  # Stopped by an admin or never played: not handed out again, not scored
+            "win_to": win_to,
+            "lose_to": lose_to
+        }
+
+    def _build_elimination(self):
+        size = max(2 ** math.ceil(math.log2(len(self.players))), 4 if self.format == "double" else 2)
+        rounds = int(math.log2(size))
+        seeded = [self.players[s - 1] if s <= len(self.players) else BYE for s in seed_order(size)]
+        double = self.format == "double"
+        final_to = ["GF", 0] if double else None
+
+        # Winners bracket: W{round}-{index}
+        for rnd in range(1, rounds + 1):
+            for i in range(size >> rnd):
+                win_to = [f"W{rnd + 1}-{i // 2}", i % 2] if rnd < rounds else final_to
+                lose_to = None
+                if double:
+                    # Round 1 losers pair up in L1; later losers drop into even L rounds
+                    lose_to = [f"L1-{i // 2}", i % 2] if rnd == 1 else [f"L{2 * rnd - 2}-{i}", 1]
+                players = seeded[2 * i:2 * i + 2] if rnd == 1 else None
+                self._add(f"W{rnd}-{i}", rnd, players, win_to, lose_to)
+        if not double:
+            return
+
+        # Losers bracket: odd rounds halve the field, even rounds take the drop-ins
+        lb_rounds = 2 * (rounds - 1)
+        count = size >> 2
+        for rnd in range(1, lb_rounds + 1):
+            if rnd > 1 and rnd % 2 == 1:
+                count //= 2
+            for i in range(count):
+                if rnd == lb_rounds:
+                    win_to = ["GF", 1]
+                elif rnd % 2 == 1:
+                    win_to = [f"L{rnd + 1}-{i}", 0]
+                else:
+                    win_to = [f"L{rnd + 1}-{i // 2}", i % 2]
+                self._add(f"L{rnd}-{i}", rnd, win_to=win_to)
+        self._add("GF", rounds + 1)
+
+    def _next_swiss_round(self):
+        """Pair players on equal points, avoiding rematches where possible"""
+        self.round += 1
+        played = {pid: set() for pid in self.players}
+        had_bye = set()
+        for m in self.matches.values():
+            a, b = m["players"]
+            if m.get("cancelled"):
+                continue  # They never actually met
+            if b == BYE:
+                had_bye.add(a)
+            else:
+                played[a].add(b)
+                played[b].add(a)
+        standing = sorted(self.players, key=lambda pid: -self.points[pid])  # Stable: ties keep seed order
+        if len(standing) % 2:
+            bye = next(pid for pid in reversed(standing) if pid not in had_bye)
+            standing.remove(bye)
+            self._add(f"S{self.round}-bye", self.round, [bye, BYE])
+        index = 0
+        while standing:
+            a = standing.pop(0)
+            b = next((pid for pid in standing if pid not in played[a]), standing[0])
+            standing.remove(b)
+            self._add(f"S{self.round}-{index}", self.round, [a, b])
+            index += 1
+        self._settle()
+
+    # ---- Progress ----
+
+    def ready_matches(self) -> list:
+        """Matches with both players known, no result yet and not cancelled"""
+        return [
+            m for m in self.matches.values()
+            if m["winner"] is None and not m.get("cancelled") and None not in m["players"] and BYE not in m["players"]
+        ]
+
+    @property
+    def finished(self) -> bool:
+        return self.champion is not None
+
+    def report(self, match_id: str, winner: Optional[int]) -> bool:
+        """Record a result; returns False if it can't be used (e.g. an elimination draw that must be replayed)"""
+        m = self.matches[match_id]
+        if m["winner"] is not None:
+            return False
+        if winner is None:
+            if self.format != "swiss":
+                return False
+            m["winner"] = BYE  # Draw
+            for pid in m["players"]:
+                self.points[pid] += 0.5
+        else:
+            if winner not in m["players"]:
+                raise ValueError(f"{winner} isn't playing {match_id}")
+            self._decide(m, winner)
+        self._settle()
+        return True
+
+    def cancel(self, match_id: str):
+        """Take a match out of play without a result (cancelled, or never played).
+
+        Swiss moves on without it (no points for either player); elimination
+        can't, so the bracket stops short of a champion.
+        """
+        self.matches[match_id]["cancelled"] = True
+        self._settle()
+
+    def _decide(self, m: dict, winner: int):
+        loser = m["players"][1] if m["players"][0] == winner else m["players"][0]
+        m["winner"] = winner
+        if self.format == "swiss":
+            self.points[winner] += 1
+            return
+        if m["id"] == "GF" and winner == m["players"][1] and loser != BYE:
+            # The losers bracket champion has now beaten everyone once: bracket reset
+            self._add("GF2", m["round"] + 1, [m["players"][0], winner])
+            return
+        for target, pid in ((m["win_to"], winner), (m["lose_to"], loser)):
+            if target:
+                self.matches[target[0]]["players"][target[1]] = pid
+        if not m["win_to"]:
+            self.champion = winner
+
+    def _settle(self):
+        """Advance byes, start the next Swiss round and crown a champion when possible"""
+        changed = True
+        while changed:
+            changed = False
+            for m in list(self.matches.values()):
+                if m["winner"] is None and None not in m["players"] and BYE in m["players"]:
+                    # A bye (or two) advances the other slot without a match
+                    self._decide(m, m["players"][0] if m["players"][1] == BYE else m["players"][1])
+                    changed = True
+        if self.format == "swiss" and not self.champion and all(
+            m["winner"] is not None or m.get("cancelled") for m in self.matches.values()
+        ):
+            if self.round < self.total_rounds:
+                self._next_swiss_round()
+            else:
+                self.champion = self.standings()[0][0]
+
+    def standings(self) -> list:
+        """Swiss: [(player_id, points, buchholz)] best first"""
+        opponents = {pid: [] for pid in self.players}
+        for m in self.matches.values():
+            a, b = m["players"]
+            if BYE not in (a, b) and not m.get("cancelled"):
+                opponents[a].append(b)
+                opponents[b].append(a)
+        rows = [
+            (pid, self.points.get(pid, 0), sum(self.points.get(o, 0) for o in opponents[pid]))
+            for pid in self.players
+        ]
+        return sorted(rows, key=lambda r: (-r[1], -r[2]))
+
+    # ---- Persistence ----
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "format": self.format,
+            "players": self.players,
+            "info": self.info,
+            "matches": self.matches,
+            "points": {str(pid): pts for pid, pts in self.points.items()},
+            "round": self.round,
+            "total_rounds": self.total_rounds,
+            "champion": self.champion
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Bracket":
+        bracket = cls.__new__(cls)
+        bracket.id = data["id"]
+        bracket.format = data["format"]
+        bracket.players = data["players"]
+        bracket.info = data["info"]
+        bracket.matches = data["matches"]
+        bracket.points = {int(pid): pts for pid, pts in data["points"].items()}
+        bracket.round = data["round"]
+        bracket.total_rounds = data["total_rounds"]
+        bracket.champion = data["champion"]
+        return bracket
@@ -0,0 +1,127 @@
+"""Rules and scoreboard content of a match, kept free of Discord objects.
+
+Everything here runs on every round, works on the plain match dict built by
+`new_match()` in RPS.py and can be benchmarked without a bot
+(see benchmarks/hot_path.py).
+"""
+import re
+from datetime import datetime
+from typing import Optional
+
+MOVE_STRIP = 15  # rounds of moves shown on the scoreboard; older ones are only counted
+
+EMOJI_TO_MOVE = {
+    "🪨": "rock",
+    "📄": "paper",
+    "✂️": "scissors"
+}
+EMOJIS = list(EMOJI_TO_MOVE.keys())
+MOVE_TO_EMOJI = {move: emoji for emoji, move in EMOJI_TO_MOVE.items()}
+MOVE_ALIASES = {"r": "rock", "p": "paper", "s": "scissors", "🪨": "rock", "📄": "paper", "✂": "scissors"}
+BEATS = {"rock": "scissors", "scissors": "paper", "paper": "rock"}  # Format: {move: the move it beats}
+
+BLURPLE, GOLD = 0x5865F2, 0xF1C40F  # discord.Color.blurple() and .gold()
+
+
+def determine_winner(move1, move2):
+    if move1 == move2:
+        return 0
+    return 1 if BEATS[move1] == move2 else 2
+
+
+def move_emoji(move: Optional[str]) -> str:
+    """Emoji for the move history; ❌ for a missed move"""
+    return MOVE_TO_EMOJI.get(move, "❌" if move is None else "❔")
+
+
+def resolve_round(match: dict, m1: Optional[str], m2: Optional[str]):
+    """Apply one round's moves (None = didn't play) to the match's history, score and result text"""
+    p1, p2 = (f"<@{pid}>" for pid in match["players"])
+    score = match["score"]
+    match["moves"][0].append(move_emoji(m1))
+    match["moves"][1].append(move_emoji(m2))
+
+    if m1 is None and m2 is None:
+        match["ties"] += 1
+        match["result_text"] = "Both players failed to play - round counted as tie."
+    elif m1 is None:
+        score[1] += 1
+        match["result_text"] = f"{p2} wins the round {p1} failed to play."
+    elif m2 is None:
+        score[0] += 1
+        match["result_text"] = f"{p1} wins the round {p2} failed to play."
+    else:
+        winner = determine_winner(m1, m2)
+        if winner == 1:
+            score[0] += 1
+            match["result_text"] = f"{p1} wins the round!"
+        elif winner == 2:
+            score[1] += 1
+            match["result_text"] = f"{p2} wins the round!"
+        else:
+            match["ties"] += 1
+            match["result_text"] = "Round is a tie."
+
+
+def parse_moves(text: str) -> Optional[list]:
+    """Moves from text like "r p s", "rock, paper" or "🪨📄✂️"; None if anything else is in there"""
+    text = text.lower().replace("\ufe0f", "")
+    if not re.fullmatch(r"(?:rock|paper|scissors|[rps🪨📄✂]|[\s,])+", text):
+        return None
+    return [MOVE_ALIASES.get(token, token) for token in re.findall(r"rock|paper|scissors|[rps🪨📄✂]", text)]
+
+
+def match_winner(match: dict) -> Optional[int]:
+    """Player id of the winner, or None for a draw"""
+    score = match["score"]
+    if match["ties"] >= match["tie_limit"] or score[0] == score[1]:
+        return None
+    return match["players"][0] if score[0] > score[1] else match["players"][1]
+
+
+def move_strip(moves: list) -> str:
+    """One player's moves as a single line, capped at the last MOVE_STRIP rounds"""
+    if len(moves) <= MOVE_STRIP:
+        return "".join(moves) or "-"
+    return f"+{len(moves) - MOVE_STRIP} … " + "".join(moves[-MOVE_STRIP:])
+
+
+def match_outcome(match: dict) -> str:
+    p1, p2 = (f"<@{pid}>" for pid in match["players"])
+    score = match["score"]
+    if match["ties"] >= match["tie_limit"]:  # If ties reached the limit, it's an automatic draw
+        return "🤝 **Match ends in a draw due to too many ties!**"
+    if score[0] > score[1]:
+        return f"🎉 **{p1} wins the match!**"
+    if score[1] > score[0]:
+        return f"🎉 **{p2} wins the match!**"
+    return "🤝 **Match ends in a draw!**"
+
+
+def scoreboard(match: dict, final=False, note: str = "") -> dict:
+    """Scoreboard as embed data (see discord.Embed.from_dict); about the same size however long the match runs"""
+    p1, p2 = (f"<@{pid}>" for pid in match["players"])
+    score = match["score"]
+    description = match["result_text"] or "Waiting for the first round..."
+    if final:
+        description += f"\n\n{match_outcome(match)}"
+    if note:
+        description += f"\n\n{note}"
+    footer = f"Rounds played: {len(match['moves'][0])} • Started"
+    if final:
+        elapsed = (datetime.now() - match["start_time"]).total_seconds()
+        footer = f"Rounds played: {len(match['moves'][0])} • Lasted {int(elapsed)} seconds • Started"
+    return {
+        "title": match["desc"] or "RPS Match",
+        "description": description,
+        "color": GOLD if final else BLURPLE,
+        # Rendered by Discord, so the embed doesn't change every second
+        "timestamp": match["start_time"].astimezone().isoformat(),
+        "fields": [
+            {"name": "Score", "value": f"{p1} **{score[0]}** - **{score[1]}** {p2}", "inline": True},
+            {"name": "Ties", "value": f"{match['ties']}/{match['tie_limit']}", "inline": True},
+            {"name": "First to", "value": str(match["wins"]), "inline": True},
+            {"name": "Moves", "value": f"{p1} {move_strip(match['moves'][0])}\n{p2} {move_strip(match['moves'][1])}", "inline": False}
+        ],
+        "footer": {"text": footer}
+    }
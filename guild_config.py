@@ -0,0 +1,71 @@
+"""Per-guild settings, kept in SQLite and served from memory.
+
+Every guild starts from the defaults RPS.py passes in; `/rps_config` stores
+only what a guild changed. The bot calls `load()` once at startup. Lookups on the command path are a dict get, and
+updates take effect on the next command without a restart.
+"""
+import json
+import sqlite3
+from typing import NamedTuple
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS guild_config (guild_id INTEGER PRIMARY KEY, settings TEXT NOT NULL)"
+
+
+class GuildConfig(NamedTuple):
+    restricted_channels: frozenset  # Channels where /rps_start can't be used
+    tie_limit: int  # Total ties that end a match in a draw
+    min_wins: int
+    max_wins: int
+    match_timeout: int  # seconds a match may run
+    move_timeout: int  # seconds a player has to answer each round's move prompt
+    webhook_scoreboards: bool  # Post scoreboards through a per-channel webhook instead of as the bot
+    image_scoreboards: bool  # Show the move history as a picture instead of the emoji strip (needs Pillow)
+
+
+class ConfigStore:
+    def __init__(self, path: str, defaults: GuildConfig):
+        self.path = path
+        self.defaults = defaults
+        self.cache = {}  # Format: {guild_id: GuildConfig} for guilds that changed something
+        # Nothing touches the database until load(), so building a store has no side effects
+
+    def connect(self) -> sqlite3.Connection:
+        # A connection per call, so updates can run in a worker thread
+        db = sqlite3.connect(self.path)
+        db.execute(SCHEMA)
+        return db
+
+    def load(self):
+        """(Re)read every guild's settings, e.g. after another process changed them"""
+        db = self.connect()
+        try:
+            rows = db.execute("SELECT guild_id, settings FROM guild_config").fetchall()
+        finally:
+            db.close()
+        self.cache = {guild_id: self.merge(json.loads(settings)) for guild_id, settings in rows}
+
+    def merge(self, settings: dict) -> GuildConfig:
+        if "restricted_channels" in settings:
+            settings = dict(settings, restricted_channels=frozenset(settings["restricted_channels"]))
+        return self.defaults._replace(**{k: v for k, v in settings.items() if k in GuildConfig._fields})
+
+    def get(self, guild_id) -> GuildConfig:
+        return self.cache.get(guild_id, self.defaults)
+
+    def update(self, guild_id: int, **changes) -> GuildConfig:
+        """Apply and persist changes for a guild; returns its new settings"""
+        config = self.get(guild_id)._replace(**changes)
+        settings = {k: v for k, v in config._asdict().items() if v != getattr(self.defaults, k)}
+        if "restricted_channels" in settings:
+            settings["restricted_channels"] = sorted(settings["restricted_channels"])
+        db = self.connect()
+        try:
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO guild_config (guild_id, settings) VALUES (?, ?)",
+                    (guild_id, json.dumps(settings))
+                )
+        finally:
+            db.close()
+        self.cache[guild_id] = config
+        return config
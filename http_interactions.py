@@ -0,0 +1,248 @@
+"""Receive slash commands and button clicks over Discord's HTTP interactions webhook.
+
+With INTERACTIONS_MODE=http the bot logs in over REST only and never opens a
+gateway connection. Discord POSTs every interaction to the application's
+Interactions Endpoint URL; each request is checked against the application's
+public key and handed to discord.py's normal dispatch, so the command tree,
+RPSView callbacks and on_interaction run unchanged. The first response a
+handler makes becomes the body of the HTTP reply.
+
+Several replicas can run behind a load balancer with a redis:// MATCH_STORE_URL:
+a match runs in the replica that started it, and clicks that land on another
+replica are recorded in the shared store by on_interaction. Checkpointed
+matches and brackets are picked up by whichever replica takes their lease in
+the store first.
+
+    python http_interactions.py keygen                                print a test key pair
+    python http_interactions.py send URL [payload.json] --seed SEED   sign and POST a payload like Discord does
+"""
+import json
+import time
+import asyncio
+import logging
+import argparse
+from typing import Optional
+
+import aiohttp
+import discord
+from aiohttp import web
+from nacl.signing import SigningKey, VerifyKey
+from nacl.exceptions import BadSignatureError
+from discord.webhook.async_ import AsyncWebhookAdapter, async_context
+
+PING, APPLICATION_COMMAND, COMPONENT, AUTOCOMPLETE, MODAL_SUBMIT = 1, 2, 3, 4, 5  # Interaction types
+CHANNEL_MESSAGE, DEFERRED_REPLY, DEFERRED_UPDATE, UPDATE_MESSAGE, AUTOCOMPLETE_RESULT = 4, 5, 6, 7, 8  # Response types
+RESPONSE_DEADLINE = 2.5  # seconds a handler gets to respond before we defer for it (Discord allows 3)
+DEFERRED_LIFETIME = 15 * 60  # seconds a deferred interaction's token stays usable
+CACHE_REFRESH = 60  # seconds before a guild missing a channel is fetched again
+
+
+def verify(public_key: str, signature: str, timestamp: str, body: bytes) -> bool:
+    """Check Discord's Ed25519 signature over timestamp + body"""
+    try:
+        VerifyKey(bytes.fromhex(public_key)).verify(timestamp.encode() + body, bytes.fromhex(signature))
+    except (BadSignatureError, ValueError):
+        return False
+    return True
+
+
+class CapturingAdapter(AsyncWebhookAdapter):
+    """Hands the first response to an interaction we're serving to the open HTTP request.
+
+    Followups, edits and anything else still go to Discord's REST API. A
+    response that comes after we deferred on the handler's behalf is sent as
+    an edit of the deferred response instead.
+    """
+
+    def __init__(self, application_id: int):
+        super().__init__()
+        self.application_id = application_id
+        self.pending = {}  # Format: {interaction_id: future resolved with the response payload}
+        self.deferred = set()  # Interactions we deferred because the handler was slow
+
+    async def create_interaction_response(self, interaction_id: int, token: str, *, session, proxy=None, proxy_auth=None, params):
+        future = self.pending.pop(interaction_id, None)
+        if future is not None and not params.files:
+            future.set_result(params.payload)
+            return {"interaction": {"id": str(interaction_id)}}
+        if interaction_id in self.deferred:
+            self.deferred.discard(interaction_id)
+            payload = params.payload or {}
+            if payload.get("type") in (CHANNEL_MESSAGE, UPDATE_MESSAGE) and not params.files:
+                data = {k: v for k, v in payload.get("data", {}).items() if k != "tts"}
+                await self.edit_original_interaction_response(
+                    self.application_id, token, session=session, proxy=proxy, proxy_auth=proxy_auth, payload=data
+                )
+            else:
+                logging.warning("Dropped a late type %s response to interaction %s", payload.get("type"), interaction_id)
+            return {"interaction": {"id": str(interaction_id)}}
+        # Attachments can't go in the HTTP reply, so those use the callback route
+        response = await super().create_interaction_response(
+            interaction_id, token, session=session, proxy=proxy, proxy_auth=proxy_auth, params=params
+        )
+        if future is not None:
+            future.set_result(None)
+        return response
+
+
+class InteractionServer:
+    def __init__(self, client: discord.Client, public_key: str, path: str = "/interactions"):
+        self.client = client
+        self.public_key = public_key
+        self.adapter = CapturingAdapter(client.application_id)
+        self.refreshed = {}  # Format: {guild_id: monotonic time it was last fetched}
+        self.cache_lock = asyncio.Lock()
+        self.app = web.Application()
+        self.app.router.add_get("/", self.health)  # Same health check keep_alive serves in gateway mode
+        self.app.router.add_post(path, self.handle)
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.Response(text="Bot is running")
+
+    async def handle(self, request: web.Request) -> web.Response:
+        deadline = asyncio.get_running_loop().time() + RESPONSE_DEADLINE
+        body = await request.read()
+        signature = request.headers.get("X-Signature-Ed25519", "")
+        timestamp = request.headers.get("X-Signature-Timestamp", "")
+        if not verify(self.public_key, signature, timestamp, body):
+            return web.Response(status=401, text="invalid request signature")
+        data = json.loads(body)
+        if data["type"] == PING:
+            return web.json_response({"type": PING})
+        reply = await self.dispatch(data, deadline)
+        if reply is None:
+            return web.Response(status=202)  # Already answered through the callback route
+        return web.json_response(reply)
+
+    async def dispatch(self, data: dict, deadline: float) -> Optional[dict]:
+        """Run the interaction through discord.py and wait for its first response"""
+        await self.ensure_cached(data)
+        interaction_id = int(data["id"])
+        future = asyncio.get_running_loop().create_future()
+        self.adapter.pending[interaction_id] = future
+        # The handler tasks created here copy this context, so their responses come to our adapter
+        token = async_context.set(self.adapter)
+        try:
+            self.client._connection.parse_interaction_create(data)
+        finally:
+            async_context.reset(token)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), max(deadline - asyncio.get_running_loop().time(), 0))
+        except asyncio.TimeoutError:
+            pass
+        self.adapter.pending.pop(interaction_id, None)
+        if future.done():
+            return future.result()
+        if data["type"] == AUTOCOMPLETE:
+            return {"type": AUTOCOMPLETE_RESULT, "data": {"choices": []}}
+        self.adapter.deferred.add(interaction_id)
+        asyncio.get_running_loop().call_later(DEFERRED_LIFETIME, self.adapter.deferred.discard, interaction_id)
+        logging.warning("Interaction %s wasn't answered within %.1fs; deferring it", interaction_id, RESPONSE_DEADLINE)
+        return {"type": DEFERRED_UPDATE if data["type"] == COMPONENT else DEFERRED_REPLY}
+
+    async def ensure_cached(self, data: dict):
+        """Make sure the interaction's guild and channels are in discord.py's cache.
+
+        Without a gateway nothing fills the cache, but channel options,
+        interaction.guild and bot.get_channel all read from it.
+        """
+        if not data.get("guild_id"):
+            return  # DMs (move prompts) need nothing cached
+        guild = self.client.get_guild(int(data["guild_id"]))
+        wanted = [int(cid) for cid in data.get("data", {}).get("resolved", {}).get("channels", {})]
+        if data.get("channel_id"):
+            wanted.append(int(data["channel_id"]))
+        if guild is None or not all(guild.get_channel_or_thread(cid) for cid in wanted):
+            await self.cache_guild(int(data["guild_id"]))
+
+    async def cache_guild(self, guild_id: int):
+        """Fetch a guild with its channels and active threads into the cache"""
+        async with self.cache_lock:
+            # Archived threads are never in the cache, so don't refetch for them on every interaction
+            if time.monotonic() - self.refreshed.get(guild_id, -CACHE_REFRESH) < CACHE_REFRESH:
+                return
+            self.refreshed[guild_id] = time.monotonic()
+            try:
+                guild = await self.client.fetch_guild(guild_id)
+                channels = await guild.fetch_channels()
+                threads = await guild.active_threads()
+            except discord.HTTPException as e:
+                logging.warning("Couldn't cache guild %s: %s", guild_id, e)
+                return
+            # Private discord.py APIs: this is how its GUILD_CREATE handler fills the cache
+            for channel in channels:
+                guild._add_channel(channel)
+            for thread in threads:
+                guild._add_thread(thread)
+            self.client._connection._add_guild(guild)
+
+    async def warm(self):
+        """Cache every guild up front, so first interactions and match resumes don't wait on fetches"""
+        async for guild in self.client.fetch_guilds(limit=None):
+            await self.cache_guild(guild.id)
+
+    async def serve(self, port: int):
+        """Serve interactions until the client is closed"""
+        runner = web.AppRunner(self.app)
+        await runner.setup()
+        await web.TCPSite(runner, "0.0.0.0", port).start()
+        logging.info("✅ Listening for interactions on port %d", port)
+        try:
+            while not self.client.is_closed():
+                await asyncio.sleep(1)
+        finally:
+            await runner.cleanup()
+
+
+class FakeSigner:
+    """Signs requests the way Discord does, for testing an endpoint without Discord.
+
+    Run the bot with DISCORD_PUBLIC_KEY set to public_key to have it accept them.
+    """
+
+    def __init__(self, seed: Optional[str] = None):
+        self.key = SigningKey(bytes.fromhex(seed)) if seed else SigningKey.generate()
+
+    @property
+    def seed(self) -> str:
+        return self.key.encode().hex()
+
+    @property
+    def public_key(self) -> str:
+        return self.key.verify_key.encode().hex()
+
+    def headers(self, body: bytes, timestamp: Optional[str] = None) -> dict:
+        timestamp = timestamp or str(int(time.time()))
+        signature = self.key.sign(timestamp.encode() + body).signature.hex()
+        return {"X-Signature-Ed25519": signature, "X-Signature-Timestamp": timestamp, "Content-Type": "application/json"}
+
+
+async def send(url: str, body: bytes, signer: FakeSigner):
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, data=body, headers=signer.headers(body)) as response:
+            print(response.status, await response.text())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("keygen", help="print a seed and the public key to run the bot with")
+    send_parser = commands.add_parser("send", help="sign a payload and POST it to an interactions endpoint")
+    send_parser.add_argument("url")
+    send_parser.add_argument("payload", nargs="?", help="JSON file with the interaction (default: a PING)")
+    send_parser.add_argument("--seed", required=True, help="seed printed by keygen")
+    args = parser.parse_args()
+
+    if args.command == "keygen":
+        signer = FakeSigner()
+        print(f"seed:       {signer.seed}\npublic key: {signer.public_key}  (DISCORD_PUBLIC_KEY)")
+        return
+    body = json.dumps({"type": PING}).encode()
+    if args.payload:
+        with open(args.payload, "rb") as f:
+            body = f.read()
+    asyncio.run(send(args.url, body, FakeSigner(args.seed)))
+
+
+if __name__ == "__main__":
+    main()
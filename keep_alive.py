@@ -1,14 +1,16 @@
-from flask import Flask
 from threading import Thread
 
-app = Flask(__name__)
-
-@app.route('/')
-def home():
-    return "Bot is running"
-
 def run():
     """Start the Flask server"""
+    # Imported here so Flask loads in the background thread instead of on the bot's startup path
+    from flask import Flask
+
+    app = Flask(__name__)
+
+    @app.route('/')
+    def home():
+        return "Bot is running"
+
     app.run(host='0.0.0.0', port=8080)
 
 def keep_alive():
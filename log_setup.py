@@ -0,0 +1,89 @@
+"""Logging for the bot: cheap on the event loop, structured when asked.
+
+Records are handed to a queue on the calling (event loop) thread and a
+background QueueListener formats and writes them, so string building,
+JSON encoding, tracebacks and stderr I/O all happen off the loop.
+
+    LOG_FORMAT=json         one JSON object per line (default: text)
+    LOG_LEVEL=DEBUG         root level (default: INFO)
+    LOG_ROUND_SAMPLE=0.1    keep this share of routine per-round records (default: 1)
+"""
+import json
+import queue
+import atexit
+import random
+import logging
+import contextvars
+import logging.handlers
+
+# Set by run_match; tasks it creates inherit it, so every record from a match carries its id
+match_id_var = contextvars.ContextVar("match_id", default=None)
+
+ROUND_LOGGER = "rps.rounds"
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(match_id)s] %(message)s"
+# Attributes every LogRecord has; anything else was passed through extra= and goes into the JSON
+STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "match_id"}
+
+
+class ContextFilter(logging.Filter):
+    """Stamps the current match id on the record (must run on the thread that logged)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.match_id = match_id_var.get()
+        return True
+
+
+class SampleFilter(logging.Filter):
+    """Keeps a share of routine records; warnings and errors always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        if record.match_id:
+            data["match_id"] = record.match_id
+        for key, value in vars(record).items():
+            if key not in STANDARD_ATTRS:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+class LoopQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue stays inside this process, so nothing needs pickling: leave message
+        # interpolation and traceback formatting to the listener thread
+        return record
+
+
+def setup_logging(fmt: str = "text", level: str = "INFO", round_sample: float = 1.0) -> logging.handlers.QueueListener:
+    """Route all logging through a queue to a background writer; returns the running listener"""
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    records = queue.SimpleQueue()
+    handler = LoopQueueHandler(records)
+    handler.addFilter(ContextFilter())
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper())
+    if round_sample < 1:
+        logging.getLogger(ROUND_LOGGER).addFilter(SampleFilter(round_sample))
+
+    listener = logging.handlers.QueueListener(records, output)
+    listener.start()
+    atexit.register(listener.stop)  # Flushes whatever is still queued
+    return listener
@@ -0,0 +1,271 @@
+"""Match state shared between bot processes.
+
+`MemoryMatchStore` keeps everything inside this process and is used when no
+store URL is configured; with a file:// URL it also snapshots itself to that
+file on shutdown. `RedisMatchStore` keeps the same records in Redis so several
+shard processes see one set of matches and one player index. Leases make
+sure only one of those processes resumes a checkpointed match or drives a
+bracket.
+
+Records are plain JSON-safe dicts built by `match_record()` in RPS.py.
+"""
+import os
+import json
+import time
+from typing import Optional
+
+KEY_PREFIX = "rps"
+MOVE_TTL = 24 * 60 * 60  # seconds a round's moves are kept in Redis
+
+# Both scripts run atomically inside Redis, so two processes can't claim the same player
+# KEYS: player index keys, ARGV[1]: match id. Returns the 1-based positions of busy players.
+CLAIM_SCRIPT = """
+local busy = {}
+for i, key in ipairs(KEYS) do
+    local owner = redis.call('GET', key)
+    if owner and owner ~= ARGV[1] then
+        table.insert(busy, i)
+    end
+end
+if #busy == 0 then
+    for _, key in ipairs(KEYS) do
+        redis.call('SET', key, ARGV[1])
+    end
+end
+return busy
+"""
+# KEYS[1]: lease key, ARGV[1]: owner, ARGV[2]: ttl in seconds. Returns 1 if ARGV[1] now holds the lease.
+LEASE_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner and owner ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+# Only clears index entries (and leases) that still point at the finished match (or their owner)
+RELEASE_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('DEL', key)
+    end
+end
+return 0
+"""
+
+
+class MemoryMatchStore:
+    """In-process store; the default for a single bot process"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path  # Snapshot file written by checkpoint(), if any
+        self.persistent = bool(path)  # Whether matches survive a restart
+        self.matches = {}  # Format: {match_id: record}
+        self.players = {}  # Format: {player_id: match_id}
+        self.moves = {}  # Format: {match_id: {round_num: {player_id: move}}}
+        self.ratings = {}  # Format: {player_id: rating}
+        self.brackets = {}  # Format: {bracket_id: Bracket.to_dict()}
+        self.leases = {}  # Format: {name: (owner, monotonic expiry)}, never snapshotted
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            # JSON object keys are strings; player ids and round numbers go back to ints
+            self.matches = data["matches"]
+            self.players = {int(pid): mid for pid, mid in data["players"].items()}
+            self.moves = {
+                mid: {int(rnd): {int(pid): move for pid, move in moves.items()} for rnd, moves in rounds.items()}
+                for mid, rounds in data["moves"].items()
+            }
+            self.ratings = {int(pid): rating for pid, rating in data["ratings"].items()}
+            self.brackets = data["brackets"]
+
+    async def checkpoint(self):
+        """Write everything to the snapshot file so the next process can pick it up"""
+        if not self.path:
+            return
+        data = {
+            "matches": self.matches,
+            "players": self.players,
+            "moves": self.moves,
+            "ratings": self.ratings,
+            "brackets": self.brackets
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    async def save_match(self, record: dict):
+        self.matches[record["id"]] = record
+
+    async def get_match(self, match_id: str) -> Optional[dict]:
+        return self.matches.get(match_id)
+
+    async def list_matches(self) -> list:
+        return list(self.matches.values())
+
+    async def delete_match(self, match_id: str):
+        record = self.matches.pop(match_id, None)
+        if record:
+            await self.release_players(match_id, record["players"])
+        self.moves.pop(match_id, None)
+
+    async def release_players(self, match_id: str, player_ids: list):
+        """Free players that are still locked to match_id"""
+        for pid in player_ids:
+            if self.players.get(pid) == match_id:
+                del self.players[pid]
+
+    async def claim_players(self, match_id: str, player_ids: list) -> list:
+        """Lock every player to match_id, or none of them; returns the ids that are busy"""
+        busy = [pid for pid in player_ids if self.players.get(pid, match_id) != match_id]
+        if not busy:
+            for pid in player_ids:
+                self.players[pid] = match_id
+        return busy
+
+    async def player_match(self, player_id: int) -> Optional[str]:
+        return self.players.get(player_id)
+
+    async def record_move(self, match_id: str, round_num: int, player_id: int, move: str) -> bool:
+        """Store a move; returns False if the player already moved this round"""
+        round_moves = self.moves.setdefault(match_id, {}).setdefault(round_num, {})
+        if player_id in round_moves:
+            return False
+        round_moves[player_id] = move
+        return True
+
+    async def get_moves(self, match_id: str, round_num: int) -> dict:
+        return dict(self.moves.get(match_id, {}).get(round_num, {}))
+
+    async def get_ratings(self, player_ids: list) -> dict:
+        """Ratings of the given players that have one"""
+        return {pid: self.ratings[pid] for pid in player_ids if pid in self.ratings}
+
+    async def set_ratings(self, ratings: dict):
+        self.ratings.update(ratings)
+
+    async def save_bracket(self, data: dict):
+        self.brackets[data["id"]] = data
+
+    async def get_bracket(self, bracket_id: str) -> Optional[dict]:
+        return self.brackets.get(bracket_id)
+
+    async def list_brackets(self) -> list:
+        return list(self.brackets.values())
+
+    async def take_lease(self, name: str, owner: str, ttl: int) -> bool:
+        """Hold name for ttl seconds unless another owner holds it; the owner calls again to renew"""
+        holder, expires = self.leases.get(name, (owner, 0))
+        if holder != owner and expires > time.monotonic():
+            return False
+        self.leases[name] = (owner, time.monotonic() + ttl)
+        return True
+
+    async def release_lease(self, name: str, owner: str):
+        if self.leases.get(name, (None,))[0] == owner:
+            del self.leases[name]
+
+
+class RedisMatchStore:
+    """Redis-backed store so every shard process shares match state"""
+
+    def __init__(self, client):
+        self.redis = client
+        self.persistent = True
+
+    def _key(self, *parts) -> str:
+        return ":".join([KEY_PREFIX, *map(str, parts)])
+
+    async def checkpoint(self):
+        """Nothing to do: Redis already holds everything"""
+
+    async def save_match(self, record: dict):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._key("match", record["id"]), json.dumps(record))
+            pipe.sadd(self._key("matches"), record["id"])
+            await pipe.execute()
+
+    async def get_match(self, match_id: str) -> Optional[dict]:
+        raw = await self.redis.get(self._key("match", match_id))
+        return json.loads(raw) if raw else None
+
+    async def list_matches(self) -> list:
+        ids = await self.redis.smembers(self._key("matches"))
+        if not ids:
+            return []
+        raws = await self.redis.mget([self._key("match", i) for i in ids])
+        return [json.loads(raw) for raw in raws if raw]
+
+    async def delete_match(self, match_id: str):
+        record = await self.get_match(match_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key("match", match_id))
+            pipe.srem(self._key("matches"), match_id)
+            await pipe.execute()
+        if record:
+            await self.release_players(match_id, record["players"])
+
+    async def release_players(self, match_id: str, player_ids: list):
+        """Free players that are still locked to match_id"""
+        await self.redis.eval(
+            RELEASE_SCRIPT, len(player_ids),
+            *[self._key("player", pid) for pid in player_ids], match_id
+        )
+
+    async def claim_players(self, match_id: str, player_ids: list) -> list:
+        """Lock every player to match_id, or none of them; returns the ids that are busy"""
+        busy = await self.redis.eval(
+            CLAIM_SCRIPT, len(player_ids),
+            *[self._key("player", pid) for pid in player_ids], match_id
+        )
+        return [player_ids[i - 1] for i in busy]
+
+    async def player_match(self, player_id: int) -> Optional[str]:
+        return await self.redis.get(self._key("player", player_id))
+
+    async def record_move(self, match_id: str, round_num: int, player_id: int, move: str) -> bool:
+        """Store a move; returns False if the player already moved this round"""
+        key = self._key("moves", match_id, round_num)
+        added = await self.redis.hsetnx(key, player_id, move)
+        await self.redis.expire(key, MOVE_TTL)
+        return bool(added)
+
+    async def get_moves(self, match_id: str, round_num: int) -> dict:
+        raw = await self.redis.hgetall(self._key("moves", match_id, round_num))
+        return {int(pid): move for pid, move in raw.items()}
+
+    async def get_ratings(self, player_ids: list) -> dict:
+        """Ratings of the given players that have one"""
+        values = await self.redis.hmget(self._key("ratings"), player_ids)
+        return {pid: int(v) for pid, v in zip(player_ids, values) if v is not None}
+
+    async def set_ratings(self, ratings: dict):
+        await self.redis.hset(self._key("ratings"), mapping=ratings)
+
+    async def save_bracket(self, data: dict):
+        await self.redis.hset(self._key("brackets"), data["id"], json.dumps(data))
+
+    async def get_bracket(self, bracket_id: str) -> Optional[dict]:
+        raw = await self.redis.hget(self._key("brackets"), bracket_id)
+        return json.loads(raw) if raw else None
+
+    async def list_brackets(self) -> list:
+        return [json.loads(raw) for raw in (await self.redis.hgetall(self._key("brackets"))).values()]
+
+    async def take_lease(self, name: str, owner: str, ttl: int) -> bool:
+        """Hold name for ttl seconds unless another owner holds it; the owner calls again to renew"""
+        return bool(await self.redis.eval(LEASE_SCRIPT, 1, self._key("lease", name), owner, ttl))
+
+    async def release_lease(self, name: str, owner: str):
+        await self.redis.eval(RELEASE_SCRIPT, 1, self._key("lease", name), owner)
+
+
+def create_store(url: Optional[str] = None):
+    """Build the store for MATCH_STORE_URL; memory when unset, memory plus a snapshot file for file://"""
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        import redis.asyncio as redis  # only needed when a shared store is configured
+        return RedisMatchStore(redis.from_url(url, decode_responses=True))
+    if url and url.startswith("file://"):
+        return MemoryMatchStore(url[len("file://"):])
+    return MemoryMatchStore()
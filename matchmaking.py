@@ -0,0 +1,87 @@
+"""Rating-aware matchmaking pool and Elo ratings for /rps_queue."""
+import bisect
+from typing import Optional
+
+DEFAULT_RATING = 1000
+K_FACTOR = 32
+BUCKET_WIDTH = 50  # rating points per bucket
+MAX_RATING_GAP = 400  # furthest apart two queued players can be and still get paired
+
+
+def expected_score(rating: float, opponent: float) -> float:
+    return 1 / (1 + 10 ** ((opponent - rating) / 400))
+
+
+def update_ratings(rating1: float, rating2: float, result: float) -> tuple:
+    """New Elo ratings; result is 1 if player 1 won, 0 if player 2 won, 0.5 for a draw"""
+    change = K_FACTOR * (result - expected_score(rating1, rating2))
+    return round(rating1 + change), round(rating2 - change)
+
+
+class MatchmakingPool:
+    """Players waiting for an opponent, indexed by rating bucket.
+
+    Each bucket keeps its players in arrival order and `keys` holds the sorted
+    non-empty bucket keys, so finding the nearest opponent is a bisection over
+    buckets instead of a scan over every queued player.
+    """
+
+    def __init__(self, bucket_width: int = BUCKET_WIDTH, max_gap: int = MAX_RATING_GAP):
+        self.bucket_width = bucket_width
+        self.max_gap = max_gap
+        self.buckets = {}  # Format: {bucket_key: {player_id: (rating, entry)}}
+        self.keys = []  # Sorted keys of non-empty buckets
+        self.players = {}  # Format: {player_id: bucket_key}
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def __contains__(self, player_id: int) -> bool:
+        return player_id in self.players
+
+    def add(self, player_id: int, rating: int, entry=None) -> Optional[tuple]:
+        """Pair the player with the closest queued opponent, or queue them.
+
+        Returns (opponent_id, opponent_entry) when a pairing was made; the
+        opponent is removed from the pool and the new player is never queued.
+        """
+        if player_id in self.players:
+            return None
+        opponent = self._closest(rating)
+        if opponent is not None:
+            opponent_entry = self.remove(opponent)
+            return opponent, opponent_entry
+        key = rating // self.bucket_width
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = {}
+            bisect.insort(self.keys, key)
+        bucket[player_id] = (rating, entry)
+        self.players[player_id] = key
+        return None
+
+    def remove(self, player_id: int):
+        """Take a player out of the pool; returns their entry (None if not queued)"""
+        key = self.players.pop(player_id, None)
+        if key is None:
+            return None
+        bucket = self.buckets[key]
+        rating, entry = bucket.pop(player_id)
+        if not bucket:
+            del self.buckets[key]
+            del self.keys[bisect.bisect_left(self.keys, key)]
+        return entry
+
+    def _closest(self, rating: int) -> Optional[int]:
+        """Longest-waiting player in the nearest bucket within max_gap"""
+        if not self.keys:
+            return None
+        key = rating // self.bucket_width
+        pos = bisect.bisect_left(self.keys, key)
+        # Only the bucket at/after the insertion point and the one before it can be nearest
+        candidates = [self.keys[i] for i in (pos - 1, pos) if 0 <= i < len(self.keys)]
+        best = min(candidates, key=lambda k: abs(k - key))
+        if abs(best - key) * self.bucket_width > self.max_gap:
+            return None
+        # Buckets are dicts, so the first player is the one who has waited longest
+        return next(iter(self.buckets[best]))
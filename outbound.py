@@ -0,0 +1,90 @@
+"""Outbound Discord calls, a few at a time and most urgent first.
+
+discord.py already waits out rate limits, but it serves whichever call asks
+first. Routing match traffic through one `OutboundQueue` means that when the
+bot is rate limited, move prompts go out before scoreboard edits, and
+scoreboard edits go out before informational DMs. Prompts have their own
+workers: a scoreboard edit or DM sleeping on a channel's rate limit holds a
+worker, and it must never be one a prompt is waiting for. Droppable calls are
+skipped once the backlog is long or they have waited too long.
+
+Interaction responses (button acks, slash command replies) don't count
+against the global limit and have a 3 second deadline, so they are never
+queued here.
+"""
+import time
+import asyncio
+import itertools
+import contextvars
+from typing import Awaitable, Callable, Optional
+
+PROMPT, SCOREBOARD, INFO = range(3)  # Priority classes, most urgent first
+
+WORKERS = 4  # Scoreboard and informational calls in flight at once
+PROMPT_WORKERS = 2  # Prompt calls in flight at once, on top of WORKERS
+BACKLOG = 100  # Waiting calls beyond which droppable ones are refused
+STALE_AFTER = 30  # seconds a droppable call may wait before it's skipped
+
+
+class OutboundQueue:
+    def __init__(self, workers: int = WORKERS, prompt_workers: int = PROMPT_WORKERS, backlog: int = BACKLOG, stale_after: float = STALE_AFTER):
+        self.workers = workers
+        self.prompt_workers = prompt_workers
+        self.backlog = backlog
+        self.stale_after = stale_after
+        self.queue: Optional[asyncio.PriorityQueue] = None  # Scoreboards and DMs; created on first use, inside the running loop
+        self.prompts: Optional[asyncio.PriorityQueue] = None  # Prompts only, served by their own workers
+        self.tasks = []
+        self.order = itertools.count()  # Keeps calls of the same priority first in, first out
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self.queue.qsize() + self.prompts.qsize() if self.tasks else 0
+
+    def post(self, priority: int, call: Callable[[], Awaitable], droppable: bool = False) -> asyncio.Future:
+        """Queue a call without waiting for it; the future resolves to its result (None if dropped).
+
+        call makes the coroutine, so nothing is built until it's the call's turn.
+        """
+        if not self.tasks:
+            self.queue = asyncio.PriorityQueue()
+            self.prompts = asyncio.PriorityQueue()
+            # Started in an empty context: tasks copy their creator's, and a worker serves every match
+            self.tasks = contextvars.Context().run(lambda: [
+                asyncio.create_task(self._worker(queue))
+                for queue, count in ((self.queue, self.workers), (self.prompts, self.prompt_workers))
+                for _ in range(count)
+            ])
+        future = asyncio.get_running_loop().create_future()
+        # Fire-and-forget callers never look at the result, so don't let asyncio complain about it
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        if droppable and len(self) >= self.backlog:
+            self.dropped += 1
+            future.set_result(None)
+            return future
+        queue = self.prompts if priority == PROMPT else self.queue
+        # The call runs in the caller's context, so whatever it logs carries the caller's match id
+        queue.put_nowait((priority, next(self.order), time.monotonic() if droppable else None, call, contextvars.copy_context(), future))
+        return future
+
+    async def run(self, priority: int, call: Callable[[], Awaitable], droppable: bool = False):
+        """Queue a call and wait for its result"""
+        return await self.post(priority, call, droppable)
+
+    async def _worker(self, queue: asyncio.PriorityQueue):
+        while True:
+            priority, _, queued_at, call, context, future = await queue.get()
+            if future.done():  # The caller gave up waiting (e.g. its match was cancelled)
+                continue
+            if queued_at is not None and time.monotonic() - queued_at > self.stale_after:
+                self.dropped += 1
+                future.set_result(None)
+                continue
+            try:
+                result = await context.run(asyncio.create_task, call())
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
@@ -0,0 +1,177 @@
+"""Move history as a picture, for guilds that turn on image scoreboards.
+
+A long match's emoji strip gets cut to the last MOVE_STRIP rounds; the image
+shows every round as a grid, ROW_ROUNDS rounds to a row. Move icons and digits
+are drawn once into an atlas and pasted from there. Each match keeps its own
+`MoveCanvas`, so a round pastes only its new column and compresses only the
+row it's in; finished rows are never drawn or compressed again. Rendering runs
+in a small thread pool so the event loop never waits on it.
+
+Like game.py this module knows nothing about Discord; RPS.py imports it only
+once a guild asks for images, so Pillow stays optional.
+"""
+import zlib
+import struct
+import asyncio
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont
+
+from game import EMOJI_TO_MOVE
+
+CELL = 28  # px per round column and per player row
+SPRITE = 24  # px of a move icon inside its cell
+ROW_ROUNDS = 20  # rounds per row of the grid
+LABEL = 140  # px for the player names left of the grid
+HEADER = 16  # px for the round numbers above each row
+ROW_GAP = 8
+WIDTH = LABEL + ROW_ROUNDS * CELL
+ROW_HEIGHT = HEADER + 2 * CELL + ROW_GAP
+DIGIT_WIDTH = 7
+BACKGROUND, TEXT, MUTED = (43, 45, 49), (219, 222, 225), (148, 155, 164)  # Discord's dark embed colours
+WORKERS = 2  # Renders at once; zlib releases the GIL while it compresses
+ZLIB_LEVEL = 6
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+SPRITES = ("rock", "paper", "scissors", "missed", "unknown")  # Order in the atlas
+
+executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="scoreboard")  # Threads start on first use
+
+
+def load_font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.load_default(size)
+    except (TypeError, OSError):  # Pillow built without FreeType only has the small bitmap font
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=None)
+def atlas() -> tuple:
+    """(move icons, digits): every icon, then the digits 0-9, each drawn once"""
+    icons = Image.new("RGBA", (SPRITE * len(SPRITES), SPRITE))
+    draw = ImageDraw.Draw(icons)
+    for index, name in enumerate(SPRITES):
+        x = index * SPRITE
+        box = (x + 2, 2, x + SPRITE - 3, SPRITE - 3)
+        if name == "rock":
+            draw.ellipse(box, fill=(142, 146, 151), outline=(95, 99, 104), width=2)
+        elif name == "paper":
+            draw.rectangle((x + 5, 2, x + SPRITE - 6, SPRITE - 3), fill=(242, 243, 245), outline=(181, 186, 193))
+            for y in (8, 12, 16):
+                draw.line((x + 8, y, x + SPRITE - 9, y), fill=(181, 186, 193))
+        elif name == "scissors":
+            draw.line((x + 4, 4, x + SPRITE - 5, SPRITE - 9), fill=(88, 101, 242), width=3)
+            draw.line((x + SPRITE - 5, 4, x + 4, SPRITE - 9), fill=(88, 101, 242), width=3)
+            draw.ellipse((x + 3, SPRITE - 10, x + 10, SPRITE - 3), outline=(88, 101, 242), width=2)
+            draw.ellipse((x + SPRITE - 11, SPRITE - 10, x + SPRITE - 4, SPRITE - 3), outline=(88, 101, 242), width=2)
+        elif name == "missed":
+            draw.line((x + 6, 6, x + SPRITE - 7, SPRITE - 7), fill=(237, 66, 69), width=3)
+            draw.line((x + SPRITE - 7, 6, x + 6, SPRITE - 7), fill=(237, 66, 69), width=3)
+        else:
+            draw.text((x + SPRITE // 2, SPRITE // 2), "?", fill=MUTED, font=load_font(18), anchor="mm")
+    digits = Image.new("RGBA", (DIGIT_WIDTH * 10, HEADER))
+    draw = ImageDraw.Draw(digits)
+    font = load_font(11)
+    for digit in range(10):
+        draw.text((digit * DIGIT_WIDTH + DIGIT_WIDTH // 2, HEADER // 2), str(digit), fill=MUTED, font=font, anchor="mm")
+    return icons, digits
+
+
+@lru_cache(maxsize=None)
+def sprite(emoji: str) -> Image.Image:
+    """Icon for a move-history emoji (see game.move_emoji)"""
+    icons, _ = atlas()
+    name = EMOJI_TO_MOVE.get(emoji) or ("missed" if emoji == "❌" else "unknown")
+    index = SPRITES.index(name)
+    return icons.crop((index * SPRITE, 0, (index + 1) * SPRITE, SPRITE))
+
+
+@lru_cache(maxsize=None)
+def digit(char: str) -> Image.Image:
+    _, digits = atlas()
+    return digits.crop((int(char) * DIGIT_WIDTH, 0, (int(char) + 1) * DIGIT_WIDTH, HEADER))
+
+
+class MoveCanvas:
+    """One match's grid, drawn and compressed a row at a time.
+
+    Only the open row (the last ROW_ROUNDS rounds or fewer) is an image;
+    finished rows live on as zlib output plus the compressor's state, so a
+    render compresses just the open row and copies the rest.
+    """
+
+    def __init__(self, names: list):
+        self.names = names  # Both players' display names, drawn in front of every row
+        self.rows = 0  # Finished rows
+        self.compressor = zlib.compressobj(ZLIB_LEVEL)  # Has taken every finished row's scanlines
+        self.compressed = b""  # What it gave back so far
+        self.row = self.new_row()
+        self.drawn = 0  # Rounds on the grid so far
+        self.lock = threading.Lock()  # Two renders of one match would paste over each other
+
+    def render(self, moves: list) -> bytes:
+        """PNG of the grid after drawing any rounds added to moves (both players' emoji lists) since last time"""
+        with self.lock:
+            rounds = len(moves[0])
+            new = [player_moves[self.drawn:rounds] for player_moves in moves]
+            for pair in zip(*new):
+                self.draw_round(pair)
+            tail = self.compressor.copy()
+            data = self.compressed + tail.compress(scanlines(self.row)) + tail.flush()
+            header = struct.pack(">IIBBBBB", WIDTH, (self.rows + 1) * ROW_HEIGHT, 8, 2, 0, 0, 0)  # 8-bit RGB
+            return PNG_SIGNATURE + chunk(b"IHDR", header) + chunk(b"IDAT", data) + chunk(b"IEND", b"")
+
+    def draw_round(self, pair: tuple):
+        row, column = divmod(self.drawn, ROW_ROUNDS)
+        if row > self.rows:
+            # The open row is full: it won't change again, so compress it for good
+            self.compressed += self.compressor.compress(scanlines(self.row))
+            self.rows = row
+            self.row = self.new_row()
+        x = LABEL + column * CELL
+        pad = (CELL - SPRITE) // 2
+        for player, emoji in enumerate(pair):
+            icon = sprite(emoji)
+            self.row.paste(icon, (x + pad, HEADER + player * CELL + pad), icon)
+        self.drawn += 1
+        if self.drawn == 1 or self.drawn % 5 == 0:
+            text = str(self.drawn)
+            left = x + (CELL - len(text) * DIGIT_WIDTH) // 2
+            for i, char in enumerate(text):
+                self.row.paste(digit(char), (left + i * DIGIT_WIDTH, 0), digit(char))
+
+    def new_row(self) -> Image.Image:
+        """An empty row of the grid with the player names in front of it"""
+        row = Image.new("RGB", (WIDTH, ROW_HEIGHT), BACKGROUND)
+        draw = ImageDraw.Draw(row)
+        font = load_font(14)
+        for player, name in enumerate(self.names):
+            draw.text((8, HEADER + player * CELL + CELL // 2), fit(draw, name, font, LABEL - 16), fill=TEXT, font=font, anchor="lm")
+        return row
+
+
+def scanlines(image: Image.Image) -> bytes:
+    """Raw PNG image data: each line of pixels after a 0 (no filter) byte"""
+    raw = image.tobytes()
+    stride = image.width * 3
+    return b"".join(b"\0" + raw[i:i + stride] for i in range(0, len(raw), stride))
+
+
+def chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def fit(draw: ImageDraw.ImageDraw, text: str, font, width: int) -> str:
+    """text, shortened with … until it fits in width px"""
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+async def render(canvas: MoveCanvas, moves: list) -> bytes:
+    """canvas.render off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(executor, canvas.render, moves)
@@ -0,0 +1,123 @@
+"""Bracket logic: byes, double elimination, Swiss pairing and cancelled matches.
+
+    python -m pytest tests
+"""
+import os
+import sys
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bracket import Bracket, BYE, seed_order  # noqa: E402
+
+
+def play_out(bracket: Bracket, pick) -> int:
+    """Report pick(match) as the winner of every match until nothing is left to play; returns matches played"""
+    played = 0
+    while not bracket.finished and bracket.ready_matches():
+        for m in bracket.ready_matches():
+            bracket.report(m["id"], pick(m))
+            played += 1
+    return played
+
+
+def losses(bracket: Bracket) -> Counter:
+    counter = Counter()
+    for m in bracket.matches.values():
+        if m["winner"] not in (None, BYE) and BYE not in m["players"]:
+            counter[next(pid for pid in m["players"] if pid != m["winner"])] += 1
+    return counter
+
+
+def better_seed(bracket: Bracket):
+    return lambda m: min(m["players"], key=bracket.players.index)
+
+
+def test_seed_order_keeps_top_seeds_apart():
+    assert seed_order(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+
+
+def test_byes_go_to_top_seeds():
+    bracket = Bracket("b", "single", [1, 2, 3, 4, 5])
+    # 8 slots: seeds 1-3 get byes and are already through to round 2
+    assert [m["id"] for m in bracket.ready_matches()] == ["W1-1", "W2-1"]
+    assert bracket.matches["W2-0"]["players"] == [1, None]
+    assert bracket.matches["W2-1"]["players"] == [2, 3]
+    assert all(m["winner"] == m["players"][0] for m in bracket.matches.values() if m["players"][1] == BYE)
+
+
+def test_single_elimination_favourite_wins():
+    bracket = Bracket("b", "single", list(range(1, 7)))
+    play_out(bracket, better_seed(bracket))
+    assert bracket.champion == 1
+
+
+def test_double_elimination_knocks_out_after_two_losses():
+    players = list(range(1, 9))
+    bracket = Bracket("b", "double", players)
+    play_out(bracket, better_seed(bracket))
+    assert bracket.champion == 1
+    counts = losses(bracket)
+    assert counts[1] == 0
+    assert all(counts[pid] == 2 for pid in players if pid != 1)
+    assert "GF2" not in bracket.matches  # The winners bracket champion won the final outright
+
+
+def test_double_elimination_grand_final_reset():
+    players = list(range(1, 5))
+    bracket = Bracket("b", "double", players)
+    # The top seed loses only the grand final; everyone else plays to seed
+    play_out(bracket, lambda m: max(m["players"], key=players.index) if m["id"] == "GF" else min(m["players"], key=players.index))
+    grand_final = bracket.matches["GF"]
+    assert grand_final["winner"] == 2
+    assert bracket.matches["GF2"]["players"] == [1, 2]  # Both finalists now have one loss
+    assert bracket.champion == 1
+    assert losses(bracket)[1] == 1 and losses(bracket)[2] == 2
+
+
+def test_swiss_avoids_rematches():
+    players = list(range(1, 9))
+    bracket = Bracket("b", "swiss", players)
+    play_out(bracket, better_seed(bracket))
+    assert bracket.finished and bracket.round == 3
+    pairs = [frozenset(m["players"]) for m in bracket.matches.values() if BYE not in m["players"]]
+    assert len(pairs) == 12
+    assert len(set(pairs)) == len(pairs)
+
+
+def test_swiss_odd_field_gives_each_bye_once():
+    bracket = Bracket("b", "swiss", list(range(1, 6)))
+    play_out(bracket, better_seed(bracket))
+    byes = [m["players"][0] for m in bracket.matches.values() if m["players"][1] == BYE]
+    assert len(byes) == bracket.total_rounds
+    assert len(set(byes)) == len(byes)
+
+
+def test_cancelled_elimination_match_is_not_replayed():
+    bracket = Bracket("b", "single", [1, 2, 3, 4])
+    bracket.cancel("W1-0")
+    assert [m["id"] for m in bracket.ready_matches()] == ["W1-1"]
+    play_out(bracket, better_seed(bracket))
+    assert not bracket.finished and not bracket.ready_matches()
+
+
+def test_cancelled_swiss_match_scores_nothing():
+    bracket = Bracket("b", "swiss", [1, 2, 3, 4])
+    first, second = bracket.ready_matches()
+    bracket.cancel(first["id"])
+    bracket.report(second["id"], second["players"][0])
+    assert bracket.round == 2  # The round moved on without the cancelled match
+    assert all(bracket.points[pid] == 0 for pid in first["players"])
+
+
+def test_unplayed_swiss_match_counts_for_neither_player():
+    bracket = Bracket("b", "swiss", [1, 2, 3, 4])
+    bracket.cancel("S1-0")  # 1 vs 2 never got a round in
+    bracket.report("S1-1", 3)
+    assert [m["players"] for m in bracket.ready_matches()] == [[3, 1], [2, 4]]
+    play_out(bracket, better_seed(bracket))
+    rows = {pid: (points, buchholz) for pid, points, buchholz in bracket.standings()}
+    # 1 only really played 3, so only 3's points count towards 1's tie-break
+    assert rows[1] == (1, bracket.points[3])
+    assert rows[2] == (1, bracket.points[4])
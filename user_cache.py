@@ -0,0 +1,50 @@
+"""Small LRU + TTL cache of player display info, so rendering never needs fetch_user."""
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+MAX_USERS = 2048
+USER_TTL = 6 * 60 * 60  # seconds before a cached name/avatar is considered stale
+
+
+class UserInfo(NamedTuple):
+    id: int
+    mention: str
+    display_name: str
+    avatar_url: Optional[str]
+
+
+class UserCache:
+    def __init__(self, maxsize: int = MAX_USERS, ttl: float = USER_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()  # Format: {user_id: (expires_at, UserInfo)}, least recently used first
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def put(self, user) -> UserInfo:
+        """Cache a discord.User/Member; Members keep their server nickname"""
+        avatar = getattr(user, "display_avatar", None)
+        info = UserInfo(user.id, user.mention, user.display_name, avatar.url if avatar else None)
+        self.entries[user.id] = (time.monotonic() + self.ttl, info)
+        self.entries.move_to_end(user.id)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return info
+
+    def get(self, user_id: int) -> Optional[UserInfo]:
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, info = entry
+        if expires_at < time.monotonic():
+            del self.entries[user_id]
+            return None
+        self.entries.move_to_end(user_id)
+        return info
+
+    def name(self, user_id: int) -> str:
+        """Display name if cached, otherwise a mention (which Discord renders for us)"""
+        info = self.get(user_id)
+        return info.display_name if info else f"<@{user_id}>"